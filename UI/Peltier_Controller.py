@@ -1,47 +1,98 @@
+import time
+STARTUP_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
-import serial
-import serial.tools.list_ports
-import threading
 import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import re
-import time
-import queue
+import numpy as np
 import os
-from PIL import Image, ImageTk
+import sys
+import json
+import argparse
+# matplotlib (and live_plot, which needs it) and PIL are imported where they
+# are first used: they are most of the import time and the main window
+# doesn't need them
+from acquisition import AcquisitionEngine
+from terminal_output import TerminalOutput
+from decimation import MinMaxDecimator, ArraySource
+from recording_index import RecordingIndex
+from session_manager import SessionManager
+from device_overview import DeviceOverviewWindow
+from port_watcher import PortWatcher
+from metrics import SamplingProfiler, MetricsDumper
+from profile_executor import ProfileExecutor, interpolate_temperature
+from settling import SettlingDetector, add_settling_arguments, detector_from_args
+from profile_schedule import build_schedule
+from profile_program import is_program_text, parse_program
+from profile_model import ProfileModel, parse_points, format_point
+from recording import load_recording
+
+def resource_path(name):
+    # Bundled files sit next to the script, or in PyInstaller's extraction dir
+    return os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))), name)
+
+
+def load_sized_image(name, width, height):
+    # Pre-sized copies (<name>_<w>x<h>.png, shipped alongside the originals)
+    # load with Tk's own PNG support. PIL is only imported to create a
+    # missing one, which is then cached next to the original when possible.
+    stem, extension = os.path.splitext(name)
+    sized_path = resource_path(f"{stem}_{width}x{height}{extension}")
+    if not os.path.exists(sized_path):
+        from PIL import Image, ImageTk
+        resized = Image.open(resource_path(name)).resize((width, height), Image.Resampling.LANCZOS)
+        try:
+            resized.save(sized_path)
+        except OSError:
+            return ImageTk.PhotoImage(resized)
+    return tk.PhotoImage(file=sized_path)
+
 
 class SerialMonitorApp:
-    def __init__(self, root):
+    def __init__(self, root, scrollback_lines=5000, profile_tick_interval=1.0, plot_max_points=4000, indexed_view_bytes=64 * 1024 * 1024):
         self.root = root
+        self.plot_max_points = plot_max_points
+        self.indexed_view_bytes = indexed_view_bytes
+        self.scrollback_lines = scrollback_lines
+        self.profile_tick_interval = profile_tick_interval
+        self.settling = SettlingDetector()  # When a setpoint counts as reached
         self.root.title("Peltier Controller")
 
-        self.serial_port = None
-        self.read_thread = None
-        self.stop_event = threading.Event()
+        self.engine = AcquisitionEngine()
+        self.engine_events = self.engine.subscribe(maxlen=10000)
         self.last_port_list = []
-        self.recording = False
-        self.record_file = None
-        self.record_file_path = None
-        self.temp_queue = queue.Queue()
-        self.current_temp = None
+        self.port_watcher = PortWatcher()
+        self.port_events = self.port_watcher.subscribe()
         self.current_setpoint = None
         self.profile_running = False
+        self.profile_executor = None
         self.ignore_stop_message = False  # New flag to control STOP message handling
 
         # Temperature profile state persistence
-        self.profile_points = []
+        self.profile_points = ProfileModel()
+        self.profile_program = None  # A loaded parametric profile replaces the point list
         self.time_var = tk.StringVar()
         self.profile_temp_var = tk.StringVar()
         self.profile_window = None
         self.profile_fig = None
         self.profile_ax = None
         self.profile_canvas = None
+        self.profile_timeline_line = None
+        self.profile_marker_line = None
+        self.live_plot = None
+        self.device_manager = None
+        self.device_overview = None
+        self.telemetry_server = None
+        self.debug_panel = None
+        self.metrics_dumper = None
+        self.profiler = SamplingProfiler()
+        self.metrics = self.engine.metrics
+        self.after_lateness = self.metrics.histogram("tk_after_lateness_seconds", "Lateness of the 50 ms engine poll callback")
+        self.poll_due = None
 
         self.setup_ui()
-        self.update_ports()
-        self.refresh_ports_periodically()
+        self.port_watcher.start()
+        self.poll_engine()
 
         self.root.resizable(False, False)
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -59,15 +110,19 @@ class SerialMonitorApp:
         self.port_menu.pack(side=tk.LEFT, padx=(0, 5))
         self.connect_button = ttk.Button(com_frame, text="Connect", command=self.connect_serial)
         self.connect_button.pack(side=tk.LEFT)
+        self.live_plot_button = ttk.Button(com_frame, text="Live Plot", command=self.open_live_plot)
+        self.live_plot_button.pack(side=tk.LEFT, padx=(5, 0))
+        self.devices_button = ttk.Button(com_frame, text="Devices", command=self.open_device_overview)
+        self.devices_button.pack(side=tk.LEFT, padx=(5, 0))
+        self.debug_button = ttk.Button(com_frame, text="Debug", command=self.open_debug_panel, width=7)
+        self.debug_button.pack(side=tk.LEFT, padx=(5, 0))
         com_frame.place(x=20, y=20)
 
         self.separator1 = ttk.Separator(frame, orient="horizontal")
         self.separator1.place(x=0, y=60, width=780, height=10)
 
         try:
-            original_image = Image.open("SE_icon.png")
-            resized_image = original_image.resize((40, 40), Image.Resampling.LANCZOS)
-            self.icon_image = ImageTk.PhotoImage(resized_image)
+            self.icon_image = load_sized_image("SE_icon.png", 40, 40)
             icon_label = tk.Label(frame, image=self.icon_image, background="white")
             icon_label.place(x=720, y=12, width=40, height=40)
         except Exception:
@@ -77,6 +132,9 @@ class SerialMonitorApp:
         self.text_area = tk.Text(frame, width=50, height=20, wrap="word")
         self.text_area.place(x=20, y=60, width=500, height=290)
         self.text_area.config(state="disabled")
+        self.terminal = TerminalOutput(self.root, self.text_area, max_lines=self.scrollback_lines)
+        self.terminal.start()
+        self.metrics.gauge("terminal_pending_chunks", "Terminal text waiting for the next flush", lambda: len(self.terminal.pending))
 
         # Buttons Section
         style = ttk.Style()
@@ -103,9 +161,7 @@ class SerialMonitorApp:
 
         # Arrow pointing from "Upcoming" To "Options" Button
         try:
-            arrow_image = Image.open("arrow.png")
-            resized_arrow_image = arrow_image.resize((10, 10), Image.Resampling.LANCZOS)
-            self.arrow_image = ImageTk.PhotoImage(resized_arrow_image)
+            self.arrow_image = load_sized_image("arrow.png", 10, 10)
             arrow = tk.Label(frame, image=self.arrow_image, background="white")
             arrow.place(x=645, y=272+61, width=10, height=10)
         except Exception:
@@ -177,6 +233,9 @@ class SerialMonitorApp:
         delete_button = ttk.Button(top_button_frame, text="Delete Selected", command=lambda: self.delete_profile_point(self.profile_window), width=30)
         delete_button.pack(anchor="center", pady=1)
 
+        paste_button = ttk.Button(top_button_frame, text="Paste Points", command=lambda: self.paste_profile_points(self.profile_window), width=30)
+        paste_button.pack(anchor="center", pady=1)
+
         listbox_frame = tk.Frame(control_frame)
         listbox_frame.pack(anchor="center", pady=5)
 
@@ -186,8 +245,7 @@ class SerialMonitorApp:
         self.profile_listbox.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
 
-        for time, temp in self.profile_points:
-            self.profile_listbox.insert(tk.END, f"Time: {time:.1f}s, Temp: {temp:.1f}°C")
+        self.refill_profile_listbox()
 
         button_frame = tk.Frame(control_frame)
         button_frame.pack(fill="x", pady=5)
@@ -214,12 +272,18 @@ class SerialMonitorApp:
         graph_frame = tk.Frame(main_frame)
         graph_frame.pack(side="right", fill="both", expand=True)
 
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
         self.profile_fig = plt.figure(figsize=(6, 4))
         self.profile_ax = self.profile_fig.add_subplot(111)
         self.profile_ax.set_title("Temperature Profile")
         self.profile_ax.set_xlabel("Time (s)")
         self.profile_ax.set_ylabel("Temperature (°C)")
         self.profile_ax.grid(True)
+        # Created once; edits only replace their data
+        self.profile_timeline_line, = self.profile_ax.plot([], [], linestyle='-', color='blue', label='Intended Profile')
+        self.profile_marker_line, = self.profile_ax.plot([], [], marker='o', linestyle='none', color='blue')
+        self.profile_ax.legend()
         self.profile_fig.tight_layout()
 
         self.profile_canvas = FigureCanvasTkAgg(self.profile_fig, master=graph_frame)
@@ -236,6 +300,8 @@ class SerialMonitorApp:
         if self.profile_window:
             self.profile_window.destroy()
         self.profile_window = None
+        self.profile_timeline_line = None
+        self.profile_marker_line = None
 
     def add_profile_point(self, profile_window):
         try:
@@ -246,66 +312,139 @@ class SerialMonitorApp:
                 profile_window.focus_set()
                 profile_window.lift()
                 return
-            time = float(time_str)
-            temperature = float(temp_str)
-            if time < 0:
-                messagebox.showerror("Error", "Time cannot be negative.", parent=profile_window)
+            try:
+                time = float(time_str)
+                temperature = float(temp_str)
+            except ValueError:
+                messagebox.showerror("Error", "Please enter valid numbers for time and temperature.", parent=profile_window)
                 profile_window.focus_set()
                 profile_window.lift()
                 return
-            if not (5 <= temperature <= 70):
-                messagebox.showerror("Error", "Temperature must be between 5 and 70 °C.", parent=profile_window)
-                profile_window.focus_set()
-                profile_window.lift()
+            if not self.discard_profile_program(profile_window):
                 return
-            if any(point[0] == time for point in self.profile_points):
-                messagebox.showerror("Error", "A point with this time already exists.", parent=profile_window)
+            try:
+                index = self.profile_points.insert(time, temperature)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=profile_window)
                 profile_window.focus_set()
                 profile_window.lift()
                 return
-            self.profile_points.append((time, temperature))
-            self.profile_points.sort(key=lambda x: x[0])
-            self.profile_listbox.delete(0, tk.END)
-            for t, temp in self.profile_points:
-                self.profile_listbox.insert(tk.END, f"Time: {t:.1f}s, Temp: {temp:.1f}°C")
+            self.profile_listbox.insert(index, format_point(time, temperature))
+            self.profile_listbox.see(index)
             self.time_var.set("")
             self.profile_temp_var.set("")
             self.update_profile_graph()
-        except ValueError:
-            messagebox.showerror("Error", "Please enter valid numbers for time and temperature.", parent=profile_window)
-            profile_window.focus_set()
-            profile_window.lift()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add point: {str(e)}", parent=profile_window)
             profile_window.focus_set()
             profile_window.lift()
 
+    def paste_profile_points(self, profile_window):
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            messagebox.showinfo("Info", "The clipboard is empty.", parent=profile_window)
+            profile_window.focus_set()
+            profile_window.lift()
+            return
+        if not self.discard_profile_program(profile_window):
+            return
+        try:
+            rows = self.profile_points.insert_many(parse_points(text))
+        except ValueError as e:
+            messagebox.showerror("Error", f"Failed to paste points: {str(e)}", parent=profile_window)
+            profile_window.focus_set()
+            profile_window.lift()
+            return
+        self.insert_profile_rows(rows)
+        self.update_profile_graph()
+        profile_window.focus_set()
+        profile_window.lift()
+
+    def insert_profile_rows(self, rows):
+        # Rows are ascending, so inserting each at its final position keeps
+        # the rows before it valid. A large batch is cheaper as one refill.
+        if len(rows) > 64:
+            self.refill_profile_listbox()
+            return
+        for row in rows:
+            self.profile_listbox.insert(row, format_point(*self.profile_points[row]))
+
+    def refill_profile_listbox(self):
+        self.profile_listbox.delete(0, tk.END)
+        if self.profile_program is not None:
+            self.profile_listbox.insert(tk.END, *self.profile_program.source_lines())
+        elif self.profile_points:
+            self.profile_listbox.insert(tk.END, *self.profile_points.labels())
+
+    def discard_profile_program(self, profile_window):
+        # Point edits start a new point list in place of a loaded program
+        if self.profile_program is None:
+            return True
+        if not messagebox.askyesno("Parametric Profile", "Replace the loaded parametric profile with a point list?", parent=profile_window):
+            profile_window.focus_set()
+            profile_window.lift()
+            return False
+        self.profile_program = None
+        self.profile_listbox.delete(0, tk.END)
+        self.update_profile_graph()
+        return True
+
+    def current_profile(self):
+        # What Send Profile runs: the loaded program, else the points
+        if self.profile_program is not None:
+            return self.profile_program
+        return list(self.profile_points)
+
     def update_profile_graph(self):
+        if self.profile_timeline_line is None:
+            return
         try:
-            self.profile_ax.clear()
-            self.profile_ax.set_title("Temperature Profile")
-            self.profile_ax.set_xlabel("Time (s)")
-            self.profile_ax.set_ylabel("Temperature (°C)")
-            self.profile_ax.grid(True)
-
-            if self.profile_points:
-                times, temps = zip(*self.profile_points)
-                self.profile_ax.plot(times, temps, marker='o', linestyle='-', color='blue', label='Intended Profile')
+            if self.profile_program is not None:
+                # Corners of the expanded program, drawn as straight lines
+                breakpoints = np.fromiter(self.profile_program.breakpoints(), dtype=np.dtype((np.float64, 2)))
+                self.profile_timeline_line.set_data(breakpoints[:, 0], breakpoints[:, 1])
+                self.profile_marker_line.set_data([], [])
+                self.profile_ax.set_xlim(-10, self.profile_program.total_time + 10)
+                self.profile_ax.set_ylim(breakpoints[:, 1].min() - 5, breakpoints[:, 1].max() + 5)
+            elif self.profile_points:
+                # The points themselves, joined by the straight ramps the
+                # executor interpolates, so an edit never recompiles the profile
+                self.profile_timeline_line.set_data(self.profile_points.times, self.profile_points.temps)
+                self.profile_marker_line.set_data(self.profile_points.times, self.profile_points.temps)
+                self.profile_ax.set_xlim(-10, self.profile_points.time_range()[1] + 10)
+                low, high = self.profile_points.temperature_range()
+                self.profile_ax.set_ylim(low - 5, high + 5)
             else:
-                self.profile_ax.plot([], [], marker='o', linestyle='-', color='blue', label='Intended Profile')
-
-            self.profile_ax.set_xlim(-10, 100) if not self.profile_points else self.profile_ax.set_xlim(-10, max([t for t, _ in self.profile_points]) + 10)
-            self.profile_ax.set_ylim(0, 80) if not self.profile_points else self.profile_ax.set_ylim(min([temp for _, temp in self.profile_points]) - 5, max([temp for _, temp in self.profile_points]) + 5)
-            self.profile_ax.legend()
-            self.profile_fig.tight_layout()
+                self.profile_timeline_line.set_data([], [])
+                self.profile_marker_line.set_data([], [])
+                self.profile_ax.set_xlim(-10, 100)
+                self.profile_ax.set_ylim(0, 80)
             if self.profile_canvas:
-                self.profile_canvas.draw()
+                self.profile_canvas.draw_idle()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to update graph: {str(e)}", parent=self.profile_canvas.get_tk_widget().winfo_toplevel() if self.profile_canvas else self.root)
             (self.profile_canvas.get_tk_widget().winfo_toplevel() if self.profile_canvas else self.root).focus_set()
             if self.profile_window and self.profile_window.winfo_exists():
                 self.profile_window.lift()
 
+    def open_live_plot(self):
+        if self.live_plot and self.live_plot.exists():
+            self.live_plot.lift()
+            return
+        from live_plot import LivePlotWindow
+        self.live_plot = LivePlotWindow(self.root, self.engine.telemetry)
+
+    def open_device_overview(self):
+        if self.device_overview and self.device_overview.exists():
+            self.device_overview.lift()
+            return
+        if self.device_manager is None:
+            self.device_manager = SessionManager(settling=self.settling)
+        # The port this window is connected to can't be opened twice
+        list_ports = lambda: [port for port in self.last_port_list if not (self.engine.connected and port == self.port_var.get())]
+        self.device_overview = DeviceOverviewWindow(self.root, self.device_manager, list_ports, self.current_profile, tick_interval=self.profile_tick_interval)
+
     def open_setup_window(self):
         pass  # Placeholder to do nothing
 
@@ -313,13 +452,13 @@ class SerialMonitorApp:
         if not self.profile_window or not self.profile_window.winfo_exists():
             return
         profile_window = self.profile_window
-        if not self.profile_points:
+        if not self.profile_points and self.profile_program is None:
             messagebox.showinfo("Info", "No profile points to save.", parent=profile_window)
             profile_window.focus_set()
             profile_window.lift()
             return
 
-        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("All files", "*.*")], title="Save temperature profile")
+        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("Parametric profiles", "*.prof"), ("All files", "*.*")], title="Save temperature profile")
         if not file_path:
             profile_window.focus_set()
             profile_window.lift()
@@ -327,8 +466,11 @@ class SerialMonitorApp:
 
         try:
             with open(file_path, "w", encoding="utf-8") as f:
-                for time, temp in self.profile_points:
-                    f.write(f"{time},{temp}\n")
+                if self.profile_program is not None:
+                    f.write(self.profile_program.source)
+                else:
+                    for time, temp in self.profile_points:
+                        f.write(f"{time},{temp}\n")
             messagebox.showinfo("Success", "Profile saved successfully.", parent=profile_window)
             profile_window.focus_set()
             profile_window.lift()
@@ -338,37 +480,30 @@ class SerialMonitorApp:
             profile_window.lift()
 
     def load_profile(self, profile_window):
-        file_path = filedialog.askopenfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("All files", "*.*")], title="Load temperature profile")
+        file_path = filedialog.askopenfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("Parametric profiles", "*.prof"), ("All files", "*.*")], title="Load temperature profile")
         if not file_path:
             profile_window.focus_set()
             profile_window.lift()
             return
 
         try:
-            self.profile_points = []
             with open(file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    time, temp = map(float, line.split(","))
-                    if time < 0:
-                        raise ValueError("Time cannot be negative.")
-                    if not (5 <= temp <= 70):
-                        raise ValueError("Temperature must be between 5 and 70 °C.")
-                    self.profile_points.append((time, temp))
-
-            self.profile_points.sort(key=lambda x: x[0])
-            self.profile_listbox.delete(0, tk.END)
-            for time, temp in self.profile_points:
-                self.profile_listbox.insert(tk.END, f"Time: {time:.1f}s, Temp: {temp:.1f}°C")
+                text = f.read()
+            if is_program_text(text):
+                self.profile_program = parse_program(text)
+                self.profile_points.clear()
+            else:
+                self.profile_points.replace(parse_points(text))
+                self.profile_program = None
+            self.refill_profile_listbox()
             self.update_profile_graph()
             messagebox.showinfo("Success", "Profile loaded successfully.", parent=profile_window)
             profile_window.focus_set()
             profile_window.lift()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load profile: {str(e)}", parent=profile_window)
-            self.profile_points = []
+            self.profile_points.clear()
+            self.profile_program = None
             self.profile_listbox.delete(0, tk.END)
             self.update_profile_graph()
             profile_window.focus_set()
@@ -379,7 +514,7 @@ class SerialMonitorApp:
             return
         profile_window = self.profile_window
         if self.profile_running:
-            self.stop_event.set()
+            self.stop_profile_executor()
             self.profile_running = False
             self.ignore_stop_message = True  # Set flag to ignore STOP message after manual stop
             self.root.after(0, lambda: self.send_profile_button.config(text="Send Profile", style="SendProfile.TButton"))
@@ -388,135 +523,50 @@ class SerialMonitorApp:
             profile_window.lift()
             return
 
-        if not self.profile_points:
+        if not self.profile_points and self.profile_program is None:
             messagebox.showinfo("Info", "No profile points to send.", parent=profile_window)
             profile_window.focus_set()
             profile_window.lift()
             return
 
-        if not self.serial_port or not self.serial_port.is_open:
+        if not self.engine.connected:
             messagebox.showerror("Error", "Serial port is not open.", parent=profile_window)
             profile_window.focus_set()
             profile_window.lift()
             return
 
-        self.stop_event.clear()
         self.profile_running = True
         self.ignore_stop_message = False  # Reset flag when starting a new profile
-        self.current_setpoint = None
-        self.current_time = 0.0
-        self.first_point_sent = False
-        self.first_point_message_sent = False
-        self.total_time = self.profile_points[-1][0]
-        self.last_update_time = time.time()
-        self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Starting profile transmission...\n")
-        try:
-            self.serial_port.write("Profile\n".encode('utf-8'))
-            self.serial_port.flush()
-            self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Sent: Profile\n")
-            time.sleep(1.0)
-        except Exception as e:
-            self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Error sending Profile command: {str(e)}\n")
-            self.profile_running = False
-            self.root.after(0, lambda: self.send_profile_button.config(text="Send Profile", style="SendProfile.TButton"))
-            self.root.after(0, lambda: self.send_button.config(state="normal"))  # Re-enable Send button
-            profile_window.focus_set()
-            profile_window.lift()
-            return
+        schedule = build_schedule(self.current_profile(), self.profile_tick_interval)
+        self.profile_executor = ProfileExecutor(self.engine, schedule, settling=self.settling)
+        self.profile_executor.start()
         self.root.after(0, lambda: self.send_profile_button.config(text="Stop", style="Stop.TButton"))
         self.root.after(0, lambda: self.send_button.config(state="disabled"))  # Disable Send button
-        self.profile_points.sort(key=lambda x: x[0])
-        self.send_profile_step()
-
-    def send_profile_step(self):
-        if not self.profile_running or self.current_time > self.total_time or self.stop_event.is_set():
-            timestamp = datetime.datetime.now().strftime('[%H:%M:%S] ')
-            if self.stop_event.is_set():
-                self.display_output(f"{timestamp}Profile transmission stopped.\n")
-            else:
-                self.display_output(f"{timestamp}Profile transmission completed.\n")
-            self.profile_running = False
-            self.stop_event.clear()
-            self.root.after(0, lambda: self.send_profile_button.config(text="Send Profile", style="SendProfile.TButton"))
-            self.root.after(0, lambda: self.send_button.config(state="normal"))  # Re-enable Send button
-            if self.profile_window and self.profile_window.winfo_exists():
-                self.profile_window.focus_set()
-                self.profile_window.lift()
-            return
 
-        try:
-            temp_had_changed = True
-            if not self.first_point_sent:
-                target_temp = self.profile_points[0][1]
-                temp = target_temp
-            else:
-                temp = self.interpolate_temperature(self.current_time)
-                if self.current_time != 0:
-                    if temp != self.interpolate_temperature(self.current_time - 1):
-                        temp_had_changed = True
-                    else:
-                        temp_had_changed = False
-                
-
-            timestamp = datetime.datetime.now().strftime('[%H:%M:%S] ')
-            command = f"{temp:.1f}\n"
-
-            if not self.first_point_sent:
-                if not self.first_point_message_sent:
-                    self.display_output(f"{timestamp}Sending first point: {command} (Waiting for {target_temp}°C)\n")
-                    self.first_point_message_sent = True
-                self.serial_port.write(command.encode('utf-8'))
-                self.serial_port.flush()
-                self.current_setpoint = temp
-                if self.current_temp is not None:
-                    if self.current_temp - target_temp == 0:
-                        self.first_point_sent = True
-                        self.display_output(f"{timestamp}Reached the first point's temperature: {target_temp}°C\n")
-                        self.display_output(f"{timestamp}Continuing profile transmission\n")
-                        self.first_point_message_sent = False
-            else:
-                if temp_had_changed:
-                    self.display_output(f"{timestamp}Sent: {command}")
-                    self.serial_port.write(command.encode('utf-8'))
-                    self.serial_port.flush()
-                    self.current_setpoint = temp
-
-            if self.first_point_sent:
-                current_time = time.time()
-                if current_time - self.last_update_time >= 1.0:
-                    self.current_time += 1.0
-                    self.last_update_time = current_time
-
-            self.root.after(1000, self.send_profile_step)
-        except Exception as e:
-            self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Send Error: {str(e)}\n")
-            self.profile_running = False
-            self.stop_event.clear()
-            self.root.after(0, lambda: self.send_profile_button.config(text="Send Profile", style="SendProfile.TButton"))
-            self.root.after(0, lambda: self.send_button.config(state="normal"))  # Re-enable Send button
-            if self.profile_window and self.profile_window.winfo_exists():
-                self.profile_window.focus_set()
-                self.profile_window.lift()
+    def stop_profile_executor(self):
+        if self.profile_executor is not None:
+            self.profile_executor.stop()
+
+    def on_profile_finished(self, result):
+        if result["executor"] is not self.profile_executor:
+            return  # A stopped run finishing after a new one was started
+        self.profile_executor = None
+        self.profile_running = False
+        self.root.after(0, lambda: self.send_profile_button.config(text="Send Profile", style="SendProfile.TButton"))
+        self.root.after(0, lambda: self.send_button.config(state="normal"))  # Re-enable Send button
+        if self.profile_window and self.profile_window.winfo_exists():
+            self.profile_window.focus_set()
+            self.profile_window.lift()
 
     def interpolate_temperature(self, current_time):
-        if not self.profile_points:
-            return 20
-
-        if current_time <= self.profile_points[0][0]:
-            return self.profile_points[0][1]
-        if current_time >= self.profile_points[-1][0]:
-            return self.profile_points[-1][1]
-
-        for i in range(len(self.profile_points) - 1):
-            t1, temp1 = self.profile_points[i]
-            t2, temp2 = self.profile_points[i + 1]
-            if t1 <= current_time <= t2:
-                fraction = (current_time - t1) / (t2 - t1)
-                interpolated_temp = temp1 + (temp2 - temp1) * fraction
-                return round(interpolated_temp, 1)
-        return self.profile_points[-1][1]
+        return interpolate_temperature(self.profile_points, current_time)
 
     def delete_profile_point(self, profile_window):
+        if self.profile_program is not None:
+            messagebox.showinfo("Info", "A parametric profile is loaded. Edit its file to change it.", parent=profile_window)
+            profile_window.focus_set()
+            profile_window.lift()
+            return
         selection = self.profile_listbox.curselection()
         if not selection:
             messagebox.showinfo("Info", "Please select a point to delete.", parent=profile_window)
@@ -525,10 +575,8 @@ class SerialMonitorApp:
             return
         index = selection[0]
         if 0 <= index < len(self.profile_points):
-            del self.profile_points[index]
-            self.profile_listbox.delete(0, tk.END)
-            for time, temp in self.profile_points:
-                self.profile_listbox.insert(tk.END, f"Time: {time:.1f}s, Temp: {temp:.1f}°C")
+            self.profile_points.delete(index)
+            self.profile_listbox.delete(index)
             self.update_profile_graph()
         else:
             messagebox.showerror("Error", "Selected index is invalid.", parent=profile_window)
@@ -536,89 +584,61 @@ class SerialMonitorApp:
             profile_window.lift()
 
     def toggle_recording(self):
-        if not self.recording:
-            file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("All files", "*.*")], title="Select file to save terminal recording")
+        if not self.engine.recording:
+            file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("Binary recordings", "*.pltr"), ("All files", "*.*")], title="Select file to save terminal recording")
             if not file_path:
                 return
             try:
-                self.record_file = open(file_path, "w", encoding="utf-8")
-                self.record_file_path = file_path
-                self.recording = True
+                self.engine.start_recording(file_path)
                 self.record_button.config(text="Stop Recording", style="StopRecording.TButton")
             except Exception as e:
                 messagebox.showerror("File Error", f"Failed to open file for recording: {str(e)}", parent=self.root)
                 self.root.focus_set()
-                self.recording = False
-                self.record_file = None
         else:
-            if self.record_file is not None:
-                try:
-                    self.record_file.close()
-                except Exception as e:
-                    messagebox.showerror("File Error", f"Failed to close recording file: {str(e)}", parent=self.root)
-                    self.root.focus_set()
-                finally:
-                    self.record_file = None
-            self.recording = False
+            try:
+                self.engine.stop_recording()
+            except Exception as e:
+                messagebox.showerror("File Error", f"Failed to close recording file: {str(e)}", parent=self.root)
+                self.root.focus_set()
             self.record_button.config(text="Record", style="Record.TButton")
 
     def view_recording(self):
-        file_path = filedialog.askopenfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("All files", "*.*")], title="Select recording file to view")
+        file_path = filedialog.askopenfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("Binary recordings", "*.pltr"), ("All files", "*.*")], title="Select recording file to view")
         if not file_path:
             return
 
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
         view_window = tk.Toplevel(self.root)
         view_window.title("Temperature Graph")
         view_window.resizable(True, True)
 
         try:
-            timestamps = []
-            inside_temps = []
-            outside_temps = []
-            set_inside_temps = []
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    match_three = re.search(r"\[(\d{2}:\d{2}:\d{2})\]\s*(-?\d+\.\d+), (-?\d+\.\d+), (-?\d+\.\d+)", line)
-                    match_two = re.search(r"\[(\d{2}:\d{2}:\d{2})\]\s*(-?\d+\.\d+), (-?\d+\.\d+)(?!,)", line)
-                    if match_three:
-                        timestamp_str = match_three.group(1)
-                        inside_temp = float(match_three.group(2))
-                        outside_temp = float(match_three.group(3))
-                        set_inside_temp = float(match_three.group(4))
-                        timestamp = datetime.datetime.strptime(timestamp_str, "%H:%M:%S")
-                        timestamps.append(timestamp)
-                        inside_temps.append(inside_temp)
-                        outside_temps.append(outside_temp)
-                        set_inside_temps.append(set_inside_temp)
-                    elif match_two:
-                        timestamp_str = match_two.group(1)
-                        inside_temp = float(match_two.group(2))
-                        outside_temp = float(match_two.group(3))
-                        timestamp = datetime.datetime.strptime(timestamp_str, "%H:%M:%S")
-                        timestamps.append(timestamp)
-                        inside_temps.append(inside_temp)
-                        outside_temps.append(outside_temp)
-                    else:
-                        continue
-
-            if not timestamps or not inside_temps or not outside_temps:
+            source, labels = self.open_recording_source(file_path)
+            time_limits = source.time_limits()
+
+            if time_limits is None:
                 messagebox.showinfo("No Data", "No valid temperature data found in the file.", parent=view_window)
                 view_window.focus_set()
                 view_window.lift()
                 view_window.destroy()
                 return
 
-            start_time = timestamps[0]
-            relative_times = [(t - start_time).total_seconds() for t in timestamps]
-
             fig, ax = plt.subplots(figsize=(8, 6))
-            ax.plot(relative_times, inside_temps, linestyle='-', label='Inside')
-            ax.plot(relative_times, outside_temps, linestyle='-', label='Outside')
-            if set_inside_temps:
-                ax.plot(relative_times, set_inside_temps, linestyle='-', label='Set')
+            # Lines start empty; the decimator fills them for the visible range
+            lines = [ax.plot([], [], linestyle='-', label=label)[0] for label in labels]
+            decimator = MinMaxDecimator(ax, source, lines, max_points=self.plot_max_points)
+            first_time, last_time = time_limits
+            if last_time > first_time:
+                ax.set_xlim(first_time, last_time)
+            else:
+                ax.set_xlim(first_time - 1, first_time + 1)
+            decimator.update()
+            value_limits = source.value_limits()
+            if value_limits is not None:
+                low, high = value_limits
+                margin = max(high - low, 1.0) * 0.05
+                ax.set_ylim(low - margin, high + margin)
             ax.set_title("Temperature Over Time")
             ax.set_xlabel("Time (s)")
             ax.set_ylabel("Temperature (°C)")
@@ -634,8 +654,18 @@ class SerialMonitorApp:
             toolbar.update()
             toolbar.pack(pady=5)
 
-            close_button = ttk.Button(view_window, text="Close", command=lambda: [plt.close(fig), view_window.destroy()])
-            close_button.pack(pady=5)
+            bottom_frame = tk.Frame(view_window)
+            bottom_frame.pack(pady=5)
+            hour_var = tk.StringVar()
+            ttk.Label(bottom_frame, text="Hour:").pack(side=tk.LEFT, padx=(0, 5))
+            hour_entry = ttk.Entry(bottom_frame, textvariable=hour_var, width=8)
+            hour_entry.pack(side=tk.LEFT)
+            go_command = lambda: self.jump_to_hour(view_window, ax, canvas, toolbar, hour_var.get())
+            hour_entry.bind("<Return>", lambda event: go_command())
+            ttk.Button(bottom_frame, text="Go", command=go_command).pack(side=tk.LEFT, padx=(5, 20))
+            ttk.Button(bottom_frame, text="Analyze", command=lambda: self.analyze_recording(view_window, file_path)).pack(side=tk.LEFT, padx=(0, 5))
+            close_button = ttk.Button(bottom_frame, text="Close", command=lambda: [plt.close(fig), view_window.destroy()])
+            close_button.pack(side=tk.LEFT)
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to process file: {str(e)}", parent=view_window)
@@ -643,6 +673,47 @@ class SerialMonitorApp:
             view_window.lift()
             view_window.destroy()
 
+    def analyze_recording(self, parent, file_path):
+        # Per-segment control performance; RMS error against the intended
+        # profile too when one is loaded in the profile editor
+        from control_analysis import analyze_file
+        from analysis_window import AnalysisWindow
+        profile = self.current_profile()
+        try:
+            segments, summary = analyze_file(file_path, profile=profile if profile else None)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to analyze the recording: {str(e)}", parent=parent)
+            return
+        AnalysisWindow(self.root, file_path, segments, summary)
+
+    def open_recording_source(self, file_path):
+        # Large files are viewed through a sparse on-disk index so only the
+        # visible window is ever read; smaller ones are simply loaded
+        if os.path.getsize(file_path) >= self.indexed_view_bytes:
+            source = RecordingIndex.open(file_path)
+            labels = ['Inside', 'Outside', 'Set'] if source.has_channel(2) else ['Inside', 'Outside']
+            return source, labels
+        relative_times, inside_temps, outside_temps, set_inside_temps = load_recording(file_path)
+        channels = [inside_temps, outside_temps]
+        labels = ['Inside', 'Outside']
+        if np.isfinite(set_inside_temps).any():
+            channels.append(set_inside_temps)
+            labels.append('Set')
+        return ArraySource(relative_times, channels), labels
+
+    def jump_to_hour(self, view_window, ax, canvas, toolbar, hour_text):
+        try:
+            hour = float(hour_text)
+        except ValueError:
+            messagebox.showerror("Error", "Enter the hour as a number, e.g. 37 or 37.5", parent=view_window)
+            view_window.focus_set()
+            return
+        x0, x1 = ax.get_xlim()
+        width = min(x1 - x0, 3600)
+        toolbar.push_current()
+        ax.set_xlim(hour * 3600, hour * 3600 + width)
+        canvas.draw_idle()
+
     def update_temperature_from_slider(self, value):
         temp = round(float(value) / 0.1) * 0.1
         temp = round(temp, 1)
@@ -650,7 +721,7 @@ class SerialMonitorApp:
         self.temperature_var.set(temp)
         self.temperature_combobox_var.set(f"{temp} °C")
         if self.profile_running:
-            self.stop_event.set()
+            self.stop_profile_executor()
             self.profile_running = False
             self.ignore_stop_message = True  # Set flag to ignore STOP message after manual stop
             self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Profile transmission stopped due to manual temperature adjustment.\n")
@@ -671,9 +742,7 @@ class SerialMonitorApp:
             temp = self.temperature_var.get()
             self.temperature_combobox_var.set(f"{temp} °C")
 
-    def update_ports(self):
-        ports = serial.tools.list_ports.comports()
-        port_names = [port.device for port in ports]
+    def update_ports(self, port_names):
         if port_names != self.last_port_list:
             self.last_port_list = port_names
             self.port_menu['values'] = port_names
@@ -685,10 +754,6 @@ class SerialMonitorApp:
             else:
                 self.port_menu.set("")
 
-    def refresh_ports_periodically(self):
-        self.update_ports()
-        self.root.after(1000, self.refresh_ports_periodically)
-
     def connect_serial(self):
         port = self.port_var.get()
         if not port:
@@ -699,30 +764,16 @@ class SerialMonitorApp:
         self.disconnect_serial()
 
         try:
-            self.serial_port = serial.Serial(port, 115200, timeout=1, write_timeout=0.5)
+            self.engine.connect(port)
             self.connect_button.config(text="Disconnect", command=self.disconnect_serial)
-            self.stop_event.clear()
-            self.read_thread = threading.Thread(target=self.read_serial)
-            self.read_thread.daemon = True
-            self.read_thread.start()
         except Exception as e:
             messagebox.showerror("Connection Error", str(e), parent=self.root)
             self.root.focus_set()
 
     def disconnect_serial(self):
-        self.stop_event.set()
-        if self.read_thread and self.read_thread.is_alive():
-            self.read_thread.join(timeout=1)
-        if self.serial_port and self.serial_port.is_open:
-            try:
-                self.serial_port.close()
-            except Exception:
-                pass
-        self.serial_port = None
-        self.read_thread = None
-        self.current_temp = None
+        self.stop_profile_executor()
+        self.engine.disconnect()
         self.current_setpoint = None
-        self.temp_queue.queue.clear()
         self.connect_button.config(text="Connect", command=self.connect_serial)
         if self.profile_running:
             self.profile_running = False
@@ -730,45 +781,75 @@ class SerialMonitorApp:
             self.root.after(0, lambda: self.send_profile_button.config(text="Send Profile", style="SendProfile.TButton"))
             self.root.after(0, lambda: self.send_button.config(state="normal"))  # Re-enable Send button
 
-    def read_serial(self):
-        while not self.stop_event.is_set():
-            try:
-                while self.serial_port and self.serial_port.in_waiting:
-                    line = self.serial_port.readline().decode("utf-8", errors="replace")
-                    cleaned_line = line.strip().strip('\r\n').strip('\x00')
-                    if cleaned_line == "STOP":
-                        if self.ignore_stop_message and not self.profile_running:
-                            self.ignore_stop_message = False  # Reset flag after ignoring one STOP
-                        else:
-                            self.stop_event.set()
-                            self.profile_running = False
-                            self.root.after(0, lambda: self.send_profile_button.config(text="Send Profile", style="SendProfile.TButton"))
-                            self.root.after(0, lambda: self.send_button.config(state="normal"))  # Re-enable Send button
-                            self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Received STOP command, transmission stopped.\n")
-                    else:
-                        match = re.search(r"(-?\d+\.\d+)\s*,\s*(-?\d+\.\d+)\s*,\s*(-?\d+\.\d+)", line)
-                        if match:
-                            inside_temp = float(match.group(1))
-                            self.temp_queue.put(inside_temp)
-                            self.current_temp = inside_temp
-                            outside_temp = match.group(2)
-                            set_inside_temp = match.group(3)
-                            timestamp = datetime.datetime.now().strftime("[%H:%M:%S] ")
-                            display_line = f"{timestamp}Inside {inside_temp} °C, Outside {outside_temp} °C, Set {set_inside_temp} °C\n"
-                            record_line = f"{timestamp}{inside_temp}, {outside_temp}, {set_inside_temp}\n"
-                            self.display_output(display_line, record_line)
-                time.sleep(0.005)
-            except (serial.SerialException, IOError) as e:
-                self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Error: Device disconnected ({str(e)})\n")
-                self.root.after(0, self.disconnect_serial)
-                break
-            except Exception as e:
-                self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Error: {str(e)})\n")
-                break
+    def poll_engine(self):
+        if self.poll_due is not None:
+            self.after_lateness.observe(max(time.perf_counter() - self.poll_due, 0.0))
+        try:
+            self.handle_engine_events(self.engine_events.drain())
+            if self.device_manager is not None:
+                self.handle_device_notices(self.device_manager.poll())
+            port_events = self.port_events.drain()
+            if port_events:
+                self.update_ports(port_events[-1][2])  # Only the latest list matters
+        finally:
+            self.poll_due = time.perf_counter() + 0.05
+            self.root.after(50, self.poll_engine)
+
+    def handle_engine_events(self, events):
+        write_error = None
+        for kind, timestamp, payload in events:
+            if kind == "sample":
+                inside_temp, outside_temp, set_inside_temp = payload
+                self.write_terminal(f"{timestamp.strftime('[%H:%M:%S] ')}Inside {inside_temp} °C, Outside {outside_temp} °C, Set {set_inside_temp} °C\n")
+            elif kind == "message":
+                self.write_terminal(payload)
+            elif kind == "stop":
+                self.handle_stop_message()
+            elif kind == "disconnected":
+                self.disconnect_serial()
+            elif kind == "profile_finished":
+                self.on_profile_finished(payload)
+            elif kind == "record_error":
+                self.record_button.config(text="Record", style="Record.TButton")
+                messagebox.showerror("File Error", f"Failed to write to file: {payload}", parent=self.root)
+                self.root.focus_set()
+            elif kind == "write_error":
+                command, reason = payload
+                self.write_terminal(f"{timestamp.strftime('[%H:%M:%S] ')}Send Error: {command}: {reason}\n")
+                write_error = reason
+        if write_error is not None:
+            # One dialog per batch, however many queued writes failed
+            if self.profile_running:
+                self.stop_profile_executor()
+            messagebox.showerror("Send Error", f"Failed to send command: {write_error}", parent=self.root)
+            self.root.focus_set()
+
+    def handle_device_notices(self, notices):
+        # Errors from the Devices window's sessions, shown over that window
+        # while it is open
+        parent = self.device_overview.window if self.device_overview and self.device_overview.exists() else self.root
+        for port, kind, payload in notices:
+            if kind == "record_error":
+                messagebox.showerror("File Error", f"{port}: failed to write to file: {payload}", parent=parent)
+            elif kind == "write_error":
+                messagebox.showerror("Send Error", f"{port}: failed to send {payload[0]}: {payload[1]}", parent=parent)
+            else:
+                continue
+            parent.focus_set()
+
+    def handle_stop_message(self):
+        if self.ignore_stop_message and not self.profile_running:
+            self.ignore_stop_message = False  # Reset flag after ignoring one STOP
+        else:
+            self.stop_profile_executor()
+            self.profile_running = False
+            self.root.after(0, lambda: self.send_profile_button.config(text="Send Profile", style="SendProfile.TButton"))
+            self.root.after(0, lambda: self.send_button.config(state="normal"))  # Re-enable Send button
+            self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Received STOP command, transmission stopped.\n")
 
     def send_command(self):
         if self.profile_running:
-            self.stop_event.set()
+            self.stop_profile_executor()
             self.profile_running = False
             self.ignore_stop_message = True  # Set flag to ignore STOP message after manual stop
             self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Profile transmission stopped due to manual temperature send.\n")
@@ -782,9 +863,10 @@ class SerialMonitorApp:
         timestamp = datetime.datetime.now().strftime("[%H:%M:%S] ")
         command = f"{temperature:.1f}\n"
         try:
-            if self.serial_port and self.serial_port.is_open:
-                self.serial_port.write(command.encode('utf-8'))
-                self.serial_port.flush()
+            if self.engine.connected:
+                # Queued for the writer thread; a failure comes back as a
+                # "write_error" event
+                self.engine.send_setpoint(temperature)
                 self.display_output(f"{timestamp}Sent: {command}")
                 self.current_setpoint = temperature
             else:
@@ -794,46 +876,99 @@ class SerialMonitorApp:
             messagebox.showerror("Send Error", f"Failed to send command: {str(e)}", parent=self.root)
             self.root.focus_set()
 
-    def display_output(self, display_message, record_message=None):
-        def update_text():
-            try:
-                self.text_area.config(state="normal")
-                self.text_area.insert("end", display_message)
-                self.text_area.see("end")
-                self.text_area.config(state="disabled")
-                if self.recording and self.record_file is not None:
-                    try:
-                        self.record_file.write(record_message if record_message else display_message)
-                        self.record_file.flush()
-                    except Exception as e:
-                        self.recording = False
-                        try:
-                            self.record_file.close()
-                        except Exception:
-                            pass
-                        self.record_file = None
-                        self.record_button.config(text="Record", style="Record.TButton")
-                        messagebox.showerror("File Error", f"Failed to write to file: {str(e)}", parent=self.root)
-                        self.root.focus_set()
-            except tk.TclError:
-                pass
-        self.root.after(0, update_text)
+    def display_output(self, display_message):
+        self.engine.log(display_message)
+
+    def write_terminal(self, text):
+        self.terminal.write(text)
+
+    def open_debug_panel(self):
+        if self.debug_panel and self.debug_panel.exists():
+            self.debug_panel.lift()
+            return
+        from debug_panel import DebugPanelWindow
+        self.debug_panel = DebugPanelWindow(self.root, self.metrics, self.profiler)
+
+    def start_metrics_dump(self, file_path, interval):
+        self.metrics_dumper = MetricsDumper(self.metrics, file_path, interval)
+        self.metrics_dumper.start()
+
+    def start_telemetry_server(self, host="127.0.0.1", port=0, unix_path=None):
+        from telemetry_server import TelemetryServer
+        self.telemetry_server = TelemetryServer(self.engine, host, port, unix_path)
+        self.telemetry_server.start()
+        address = unix_path if unix_path is not None else "%s:%d" % self.telemetry_server.address[:2]
+        self.display_output(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Streaming telemetry on {address}\n")
 
     def on_close(self):
-        if self.recording and self.record_file is not None:
+        if self.engine.recording:
             try:
-                self.record_file.close()
+                self.engine.stop_recording()
             except Exception as e:
                 messagebox.showerror("File Error", f"Failed to close recording file: {str(e)}", parent=self.root)
                 self.root.focus_set()
-            finally:
-                self.record_file = None
+        self.port_watcher.stop()
         self.disconnect_serial()
+        if self.telemetry_server is not None:
+            self.telemetry_server.close()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.stop()
+        self.profiler.stop()
+        self.terminal.stop()
+        if self.live_plot and self.live_plot.exists():
+            self.live_plot.close()
+        if self.device_overview and self.device_overview.exists():
+            self.device_overview.close()
+        if self.debug_panel and self.debug_panel.exists():
+            self.debug_panel.close()
+        if self.device_manager is not None:
+            self.device_manager.close()
         if self.profile_window:
             self.profile_window.destroy()
         self.root.destroy()
 
+def report_startup(root, app, imports_done, app_built):
+    # Time to first window: forces the main window to be mapped and drawn,
+    # prints the timings as JSON and exits
+    root.update()
+    shown = time.perf_counter()
+    print(json.dumps({
+        "imports_ms": round((imports_done - STARTUP_START) * 1000, 1),
+        "build_ui_ms": round((app_built - imports_done) * 1000, 1),
+        "first_window_ms": round((shown - STARTUP_START) * 1000, 1),
+        "heavy_modules_loaded": [name for name in ("matplotlib", "PIL") if name in sys.modules],
+        "frozen": bool(getattr(sys, "frozen", False)),
+    }))
+    sys.stdout.flush()
+    app.on_close()
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peltier Controller")
+    parser.add_argument("--measure-startup", action="store_true", help="print time-to-first-window as JSON and exit")
+    parser.add_argument("--telemetry-port", type=int, help="stream samples and events as JSON lines on this TCP port")
+    parser.add_argument("--telemetry-host", default="127.0.0.1", help="address for --telemetry-port (default: localhost only)")
+    parser.add_argument("--telemetry-socket", help="stream samples and events on this Unix socket instead")
+    parser.add_argument("--metrics-file", help="periodically write metrics here (Prometheus text for *.prom, JSON otherwise)")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="seconds between metrics dumps")
+    add_settling_arguments(parser)
+    args = parser.parse_args()
+    try:
+        settling = detector_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    imports_done = time.perf_counter()
     root = tk.Tk()
     app = SerialMonitorApp(root)
-    root.mainloop()
\ No newline at end of file
+    app.settling = settling
+    if args.metrics_file:
+        app.start_metrics_dump(args.metrics_file, args.metrics_interval)
+    if args.telemetry_port is not None or args.telemetry_socket:
+        try:
+            app.start_telemetry_server(args.telemetry_host, args.telemetry_port or 0, args.telemetry_socket)
+        except OSError as e:
+            messagebox.showerror("Telemetry Error", f"Failed to start the telemetry server: {str(e)}", parent=root)
+    if args.measure_startup:
+        report_startup(root, app, imports_done, time.perf_counter())
+    else:
+        root.mainloop()
\ No newline at end of file
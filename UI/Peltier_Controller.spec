@@ -5,12 +5,13 @@ a = Analysis(
     ['Peltier_Controller.py'],
     pathex=[],
     binaries=[],
-    datas=[('arrow.png', '.'), ('SE_icon.png', '.')],
+    datas=[('arrow.png', '.'), ('SE_icon.png', '.'), ('arrow_10x10.png', '.'), ('SE_icon_40x40.png', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Not used by the app; keeps them out of the archive unpacked at every start
+    excludes=['matplotlib.tests', 'numpy.tests', 'PIL.ImageQt', 'IPython', 'pytest'],
     noarchive=False,
     optimize=0,
 )
@@ -0,0 +1,277 @@
+import serial
+import threading
+import datetime
+import time
+import selectors
+from collections import deque
+from recording import open_record_writer, EVENT_STOP, EVENT_DISCONNECTED
+from telemetry import TelemetryStore
+from frame_decoder import FrameDecoder, STOP
+from metrics import MetricsRegistry
+from serial_writer import SerialWriter
+
+
+class Subscription:
+    # Events are (kind, timestamp, payload) tuples:
+    #   ("sample", datetime, (inside, outside, setpoint))
+    #   ("message", datetime, text)
+    #   ("stop", datetime, None)
+    #   ("disconnected", datetime, reason)
+    #   ("record_error", datetime, reason)
+    #   ("event", datetime, (EVENT_* kind, value)), e.g. a setpoint sent
+    #   ("write_error", datetime, (command, reason))
+    def __init__(self, maxlen=None):
+        self.events = deque(maxlen=maxlen)
+
+    def push(self, event):
+        self.events.append(event)
+
+    def drain(self):
+        batch = []
+        events = self.events
+        while events:
+            try:
+                batch.append(events.popleft())
+            except IndexError:
+                break
+        return batch
+
+
+class AcquisitionEngine:
+    # Owns the serial port, line framing, parsing, timestamping and recording.
+    # Everything runs on the reader thread; consumers (the GUI, exporters, ...)
+    # subscribe and pull batches of events at their own pace.
+    def __init__(self, baudrate=115200, telemetry_capacity=262144, idle_timeout=0.25, metrics=None):
+        self.baudrate = baudrate
+        self.idle_timeout = idle_timeout
+        self.telemetry = TelemetryStore(telemetry_capacity)
+        self.serial_port = None
+        self.decoder = FrameDecoder()
+        self.read_thread = None
+        self.stop_event = threading.Event()
+        self.subscriptions = []
+        self.subscriptions_lock = threading.Lock()
+        self.record_lock = threading.Lock()
+        self.recorder = None
+        self.current_temp = None
+        self.current_outside_temp = None
+        self.current_device_setpoint = None
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.register_metrics()
+        self.writer = SerialWriter(self)
+
+    def register_metrics(self):
+        # Most of these read counters that exist anyway; only the read count
+        # and the record timer add work to the reader thread
+        metrics = self.metrics
+        metrics.counter_function("serial_bytes_total", "Bytes read from the serial port", lambda: self.decoder.bytes_received)
+        metrics.counter_function("serial_frames_total", "Frames decoded (samples and STOP)", lambda: self.decoder.frames)
+        metrics.counter_function("serial_malformed_frames_total", "Segments that were not a valid frame", lambda: self.decoder.malformed)
+        metrics.gauge("serial_pending_bytes", "Partial frame bytes waiting in the decoder", lambda: len(self.decoder.buffer))
+        metrics.gauge("engine_subscriber_queue_max", "Deepest subscriber event queue", lambda: max((len(s.events) for s in self.subscriptions), default=0))
+        metrics.counter_function("telemetry_samples_total", "Samples stored in the telemetry ring", lambda: self.telemetry.count)
+        self.reads = metrics.counter("serial_reads_total", "Reads that returned data")
+        self.record_latency = metrics.histogram("record_write_seconds", "Time spent in recorder calls")
+
+    @property
+    def connected(self):
+        return self.serial_port is not None and self.serial_port.is_open
+
+    @property
+    def recording(self):
+        return self.recorder is not None
+
+    def subscribe(self, maxlen=None):
+        return self.add_subscription(Subscription(maxlen))
+
+    def add_subscription(self, subscription):
+        with self.subscriptions_lock:
+            self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.subscriptions_lock:
+            self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+
+    def publish(self, event):
+        for subscription in self.subscriptions:
+            subscription.push(event)
+
+    def connect(self, port, start_reader=True):
+        # start_reader=False leaves reading to the caller (poll_serial), e.g.
+        # a DeviceScheduler serving many engines from one thread
+        self.disconnect()
+        self.serial_port = serial.Serial(port, self.baudrate, timeout=1, write_timeout=0.5)
+        self.decoder.reset()  # Counters carry over so metrics stay monotonic
+        self.stop_event.clear()
+        self.writer.start()
+        if not start_reader:
+            return
+        self.read_thread = threading.Thread(target=self.read_loop)
+        self.read_thread.daemon = True
+        self.read_thread.start()
+
+    def disconnect(self):
+        self.stop_event.set()
+        self.writer.stop()
+        if self.read_thread and self.read_thread.is_alive() and self.read_thread is not threading.current_thread():
+            self.read_thread.join(timeout=1)
+        if self.serial_port and self.serial_port.is_open:
+            try:
+                self.serial_port.close()
+            except Exception:
+                pass
+        self.serial_port = None
+        self.read_thread = None
+        self.current_temp = None
+        self.current_outside_temp = None
+        self.current_device_setpoint = None
+
+    def send(self, text):
+        # Queues a command for the writer thread; never blocks on the port
+        if not self.connected:
+            raise serial.SerialException("Serial port is not open.")
+        self.writer.send(text)
+
+    def send_setpoint(self, temp):
+        # Like send(), but coalesces with a setpoint still waiting in the
+        # queue. Recorded as EVENT_SETPOINT_SENT once actually written.
+        if not self.connected:
+            raise serial.SerialException("Serial port is not open.")
+        self.writer.send(f"{temp:.1f}\n", setpoint=temp)
+
+    def write(self, text):
+        # Blocking write (up to write_timeout); used by the writer thread
+        port = self.serial_port
+        if port is None or not port.is_open:
+            raise serial.SerialException("Serial port is not open.")
+        port.write(text.encode('utf-8'))
+        port.flush()
+
+    def start_recording(self, file_path):
+        recorder = open_record_writer(file_path)
+        with self.record_lock:
+            self.recorder = recorder
+
+    def stop_recording(self):
+        with self.record_lock:
+            recorder = self.recorder
+            self.recorder = None
+        if recorder is not None:
+            recorder.close()
+
+    def record(self, method, *args):
+        with self.record_lock:
+            if self.recorder is None:
+                return
+            start = time.perf_counter()
+            try:
+                getattr(self.recorder, method)(*args)
+                self.record_latency.observe(time.perf_counter() - start)
+            except Exception as e:
+                try:
+                    self.recorder.close()
+                except Exception:
+                    pass
+                self.recorder = None
+                self.publish(("record_error", datetime.datetime.now(), str(e)))
+
+    def record_event(self, kind, value=None):
+        timestamp = datetime.datetime.now()
+        self.record("write_event", timestamp, kind, value)
+        self.publish(("event", timestamp, (kind, value)))
+
+    def log(self, message):
+        # Free-form terminal lines (already timestamped by the caller) are
+        # recorded verbatim, the same way the terminal shows them.
+        self.record("write_message", message)
+        self.publish(("message", datetime.datetime.now(), message))
+
+    def receive(self, data):
+        # Bytes straight from the port. Every complete frame is decoded in one
+        # pass and handled as a batch stamped with the read time; a partial
+        # frame waits in the decoder for the next read.
+        if not data:
+            return
+        self.reads.inc()
+        frames = self.decoder.feed(data)
+        if frames:
+            self.handle_frames(frames)
+
+    def handle_frames(self, frames):
+        timestamp = datetime.datetime.now()
+        monotonic_time = time.monotonic()
+        for frame in frames:
+            if frame is STOP:
+                self.record("write_event", timestamp, EVENT_STOP)
+                self.publish(("stop", timestamp, None))
+                continue
+            inside_temp, outside_temp, set_inside_temp = frame
+            self.current_temp = inside_temp
+            self.current_outside_temp = outside_temp
+            self.current_device_setpoint = set_inside_temp
+            self.telemetry.append(monotonic_time, inside_temp, outside_temp, set_inside_temp)
+            self.record("write_sample", timestamp, inside_temp, outside_temp, set_inside_temp)
+            self.publish(("sample", timestamp, frame))
+
+    def poll_serial(self, ready=False):
+        # Handles whatever the port has buffered. Returns False once the port
+        # has failed, after reporting it. Used by the engine's own reader
+        # thread and by a shared DeviceScheduler; ready=True means the fd was
+        # reported readable.
+        try:
+            port = self.serial_port
+            if port is not None:
+                # Only what is already buffered: readline() would block on
+                # the padding after a frame until the next one arrives
+                waiting = port.in_waiting
+                if waiting:
+                    self.receive(port.read(waiting))
+                elif ready:
+                    # Without a selector this is the blocking wait for the
+                    # first byte. With one, readable-but-empty is how a
+                    # vanished device shows up and read() raises for it
+                    # instead of spinning.
+                    data = port.read(1)
+                    if data and port.in_waiting:
+                        data += port.read(port.in_waiting)
+                    self.receive(data)
+            if self.recorder is not None:
+                self.record("poll")
+            return True
+        except (serial.SerialException, IOError) as e:
+            if self.stop_event.is_set():
+                return False
+            timestamp = datetime.datetime.now()
+            self.log(f"{timestamp.strftime('[%H:%M:%S] ')}Error: Device disconnected ({str(e)})\n")
+            self.record("write_event", timestamp, EVENT_DISCONNECTED)
+            self.publish(("disconnected", timestamp, str(e)))
+            return False
+        except Exception as e:
+            self.log(f"{datetime.datetime.now().strftime('[%H:%M:%S] ')}Error: {str(e)}\n")
+            return False
+
+    def read_loop(self):
+        # Sleeps until the port has data instead of polling in_waiting: on
+        # POSIX the thread blocks in select() on the port's fd (idle_timeout
+        # bounds how long a stop request or the recorder's poll can wait);
+        # elsewhere (Windows) in a read() for the first byte, bounded by the
+        # port timeout. Either way everything that has arrived is then read
+        # in a single call.
+        port = self.serial_port
+        selector = None
+        try:
+            selector = selectors.DefaultSelector()
+            selector.register(port.fileno(), selectors.EVENT_READ)
+        except (AttributeError, OSError, ValueError):
+            if selector is not None:
+                selector.close()
+            selector = None
+        try:
+            while not self.stop_event.is_set():
+                ready = bool(selector.select(self.idle_timeout)) if selector is not None else True
+                if self.stop_event.is_set() or not self.poll_serial(ready):
+                    break
+        finally:
+            if selector is not None:
+                selector.close()
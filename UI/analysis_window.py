@@ -0,0 +1,49 @@
+import os
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+from control_analysis import COLUMNS, segment_rows, format_summary, save_csv
+
+
+class AnalysisWindow:
+    # Control-performance table of a recording (control_analysis.analyze):
+    # one row per setpoint segment, the whole-recording figures underneath
+    # and a CSV export of the full table.
+    def __init__(self, root, file_path, segments, summary):
+        self.segments = segments
+        self.file_path = file_path
+
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Analysis - {os.path.basename(file_path)}")
+        self.window.geometry("1100x420")
+
+        frame = tk.Frame(self.window)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        self.tree = ttk.Treeview(frame, columns=[c[0] for c in COLUMNS], show="headings", height=12)
+        for name, heading, _ in COLUMNS:
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=80, anchor="e")
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill="y")
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        for row in segment_rows(segments):
+            self.tree.insert("", "end", values=row)
+
+        ttk.Label(self.window, text=format_summary(summary).strip(), wraplength=1060).pack(fill="x", padx=10)
+
+        controls = tk.Frame(self.window)
+        controls.pack(pady=(5, 10))
+        ttk.Button(controls, text="Save CSV", command=self.save, width=14).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(controls, text="Close", command=self.window.destroy, width=14).pack(side=tk.LEFT)
+
+    def save(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+                                                 initialfile=os.path.splitext(os.path.basename(self.file_path))[0] + "_analysis.csv",
+                                                 title="Save analysis", parent=self.window)
+        if not file_path:
+            return
+        try:
+            save_csv(self.segments, file_path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save the analysis: {str(e)}", parent=self.window)
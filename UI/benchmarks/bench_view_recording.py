@@ -0,0 +1,76 @@
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recording import parse_text_recording
+
+
+def legacy_parse(file_path):
+    # The per-line parser view_recording used before parse_text_recording
+    timestamps = []
+    inside_temps = []
+    outside_temps = []
+    set_inside_temps = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            match_three = re.search(r"\[(\d{2}:\d{2}:\d{2})\]\s*(-?\d+\.\d+), (-?\d+\.\d+), (-?\d+\.\d+)", line)
+            match_two = re.search(r"\[(\d{2}:\d{2}:\d{2})\]\s*(-?\d+\.\d+), (-?\d+\.\d+)(?!,)", line)
+            if match_three:
+                timestamps.append(datetime.datetime.strptime(match_three.group(1), "%H:%M:%S"))
+                inside_temps.append(float(match_three.group(2)))
+                outside_temps.append(float(match_three.group(3)))
+                set_inside_temps.append(float(match_three.group(4)))
+            elif match_two:
+                timestamps.append(datetime.datetime.strptime(match_two.group(1), "%H:%M:%S"))
+                inside_temps.append(float(match_two.group(2)))
+                outside_temps.append(float(match_two.group(3)))
+    start_time = timestamps[0]
+    relative_times = [(t - start_time).total_seconds() for t in timestamps]
+    return relative_times, inside_temps, outside_temps, set_inside_temps
+
+
+def write_recording(file_path, lines):
+    rng = random.Random(0)
+    start = datetime.datetime(2025, 1, 1, 0, 0, 0)
+    with open(file_path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            stamp = (start + datetime.timedelta(seconds=i)).strftime("[%H:%M:%S] ")
+            if i % 600 == 0:
+                f.write(f"{stamp}Sent: {rng.uniform(5, 70):.1f}\n")
+            f.write(f"{stamp}{rng.uniform(5, 70):.1f}, {rng.uniform(15, 30):.1f}, {rng.uniform(5, 70):.1f}\n")
+
+
+def run(lines, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "recording.txt")
+        write_recording(file_path, lines)
+        size_mb = os.path.getsize(file_path) / 1e6
+        print(f"{lines} samples, {size_mb:.1f} MB")
+        results = {}
+        for name, parser in (("legacy", legacy_parse), ("vectorized", parse_text_recording)):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                parser(file_path)
+                best = min(best, time.perf_counter() - start)
+            results[name] = best
+            print(f"{name:>10}: {best:8.3f} s  {lines / best:12,.0f} lines/s")
+        print(f"   speedup: {results['legacy'] / results['vectorized']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the legacy and vectorized recording parsers")
+    parser.add_argument("--lines", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.lines, args.repeat)
@@ -0,0 +1,369 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import datetime
+import tempfile
+import threading
+import subprocess
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acquisition import AcquisitionEngine
+from recording import TextRecordWriter, BinaryRecordWriter, load_recording
+from profile_schedule import CompiledProfile
+from metrics import MetricsRegistry
+from profile_executor import ProfileExecutor
+from settling import SettlingDetector
+from telemetry import TelemetryStore
+from device_simulator import build_frame
+from frame_decoder import FrameDecoder
+
+# Machine-readable benchmarks for the ingest, record, display and profile
+# paths. Output is one JSON document:
+#   {"meta": {...}, "results": {"<benchmark>": {...}, ...}}
+# Rates are per second, durations in seconds, latencies in milliseconds.
+# Compare two runs of the same --quick/full mode between releases.
+BENCHMARKS = ("decode", "parse", "latency", "reader", "record_write", "view_load", "profile_jitter")
+
+
+def best_of(repeat, function):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def percentiles(values_ms):
+    values = np.asarray(values_ms)
+    if len(values) == 0:
+        return {"count": 0}
+    return {
+        "count": int(len(values)),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+def sample_frames(count, seed=0):
+    rng = random.Random(seed)
+    return [build_frame(rng.uniform(5, 70), rng.uniform(15, 30), rng.uniform(5, 70)) for _ in range(count)]
+
+
+def bench_parse(args):
+    # AcquisitionEngine.receive on firmware frames in port-sized reads, with
+    # one subscriber the way the GUI runs it, no port and no recording
+    stream = b"".join(sample_frames(args.lines))
+    chunks = [stream[i:i + 4096] for i in range(0, len(stream), 4096)]
+
+    def run():
+        engine = AcquisitionEngine()
+        engine.subscribe(maxlen=10000)
+        for chunk in chunks:
+            engine.receive(chunk)
+
+    seconds = best_of(args.repeat, run)
+    return {"lines": args.lines, "seconds": seconds, "lines_per_s": args.lines / seconds}
+
+
+def bench_decode(args):
+    # FrameDecoder alone: bytes to numeric tuples
+    stream = b"".join(sample_frames(args.lines))
+    chunks = [stream[i:i + 4096] for i in range(0, len(stream), 4096)]
+
+    def run():
+        decoder = FrameDecoder()
+        for chunk in chunks:
+            decoder.feed(chunk)
+
+    seconds = best_of(args.repeat, run)
+    return {"frames": args.lines, "seconds": seconds, "frames_per_s": args.lines / seconds, "mb_per_s": len(stream) / 1e6 / seconds}
+
+
+class LatencyRecorder:
+    # Wraps a real writer and notes when each sample has been recorded; the
+    # inside temperature carries the frame's sequence number
+    def __init__(self, writer):
+        self.writer = writer
+        self.recorded = {}
+
+    def write_sample(self, timestamp, inside_temp, outside_temp, set_inside_temp):
+        self.writer.write_sample(timestamp, inside_temp, outside_temp, set_inside_temp)
+        self.recorded[int(inside_temp)] = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+
+def bench_latency(args):
+    # Byte arrival on the (pseudo) serial port to the line being in the
+    # recording, through the real reader thread
+    if not hasattr(os, "openpty"):
+        return {"skipped": "needs a POSIX pseudo-terminal"}
+    master_fd, slave_fd = open_pty()
+    engine = AcquisitionEngine()
+    sent = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            engine.connect(os.ttyname(slave_fd))
+            recorder = LatencyRecorder(TextRecordWriter(os.path.join(tmp, "latency.txt")))
+            engine.recorder = recorder
+            period = 1.0 / args.rate
+            deadline = time.monotonic()
+            for sequence in range(args.frames):
+                sent[sequence] = time.monotonic()
+                os.write(master_fd, build_frame(sequence, 22.0, 25.0))
+                deadline += period
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+            settle = time.monotonic() + 2.0
+            while len(recorder.recorded) < args.frames and time.monotonic() < settle:
+                time.sleep(0.01)
+        finally:
+            engine.stop_recording()
+            engine.disconnect()
+            os.close(master_fd)
+            os.close(slave_fd)
+    latencies = [(recorder.recorded[s] - sent[s]) * 1000 for s in sent if s in recorder.recorded]
+    result = percentiles(latencies)
+    result.update({"frames_sent": args.frames, "frames_recorded": len(recorder.recorded), "rate_hz": args.rate})
+    return result
+
+
+def open_pty():
+    import tty
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(master_fd)
+    tty.setraw(slave_fd)
+    return master_fd, slave_fd
+
+
+def bench_reader(args):
+    # Reader thread cost: CPU while the port is silent, and how many frames a
+    # second it absorbs when the device sends as fast as the pty allows
+    if not hasattr(os, "openpty"):
+        return {"skipped": "needs a POSIX pseudo-terminal"}
+    master_fd, slave_fd = open_pty()
+    engine = AcquisitionEngine()
+    try:
+        engine.connect(os.ttyname(slave_fd))
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        time.sleep(args.idle_seconds)
+        idle_cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+
+        frames = b"".join(sample_frames(1000))
+        total = args.lines - args.lines % 1000
+        start = time.perf_counter()
+        for _ in range(total // 1000):
+            os.write(master_fd, frames)
+        settle = time.monotonic() + 10.0
+        while engine.telemetry.count < total and time.monotonic() < settle:
+            time.sleep(0.001)
+        seconds = time.perf_counter() - start
+    finally:
+        engine.disconnect()
+        os.close(master_fd)
+        os.close(slave_fd)
+    return {
+        "idle_seconds": args.idle_seconds,
+        "idle_cpu_percent": idle_cpu * 100,
+        "frames": total,
+        "frames_handled": engine.telemetry.count,
+        "seconds": seconds,
+        "frames_per_s": engine.telemetry.count / seconds,
+    }
+
+
+def bench_record_write(args):
+    results = {}
+    timestamp = datetime.datetime.now()
+    values = [(random.uniform(5, 70), random.uniform(15, 30), random.uniform(5, 70)) for _ in range(args.lines)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, writer_class, extension in (("text", TextRecordWriter, ".txt"), ("binary", BinaryRecordWriter, ".pltr")):
+            path = os.path.join(tmp, "record" + extension)
+
+            def run():
+                writer = writer_class(path)
+                for inside_temp, outside_temp, set_inside_temp in values:
+                    writer.write_sample(timestamp, inside_temp, outside_temp, set_inside_temp)
+                writer.close()
+
+            seconds = best_of(args.repeat, run)
+            results[name] = {
+                "samples": len(values),
+                "seconds": seconds,
+                "samples_per_s": len(values) / seconds,
+                "bytes": os.path.getsize(path),
+                "mb_per_s": os.path.getsize(path) / 1e6 / seconds,
+            }
+    return results
+
+
+def write_sample_files(directory, samples):
+    start = datetime.datetime(2025, 1, 1)
+    rng = np.random.default_rng(0)
+    temps = np.round(rng.uniform(5, 70, size=(samples, 3)), 1)
+    text_path = os.path.join(directory, f"view_{samples}.txt")
+    binary_path = os.path.join(directory, f"view_{samples}.pltr")
+    text_writer = TextRecordWriter(text_path)
+    binary_writer = BinaryRecordWriter(binary_path)
+    for i, (inside_temp, outside_temp, set_inside_temp) in enumerate(temps.tolist()):
+        timestamp = start + datetime.timedelta(seconds=i)
+        text_writer.write_sample(timestamp, inside_temp, outside_temp, set_inside_temp)
+        binary_writer.write_sample(timestamp, inside_temp, outside_temp, set_inside_temp)
+    text_writer.close()
+    binary_writer.close()
+    return text_path, binary_path
+
+
+def bench_view_load(args):
+    # load_recording() (what view_recording plots from) against file size
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for samples in args.sizes:
+            text_path, binary_path = write_sample_files(tmp, samples)
+            for name, path in (("text", text_path), ("binary", binary_path)):
+                seconds = best_of(args.repeat, lambda: load_recording(path))
+                results.append({
+                    "format": name,
+                    "samples": samples,
+                    "bytes": os.path.getsize(path),
+                    "seconds": seconds,
+                    "samples_per_s": samples / seconds,
+                })
+            os.remove(text_path)
+            os.remove(binary_path)
+    return results
+
+
+class TimingEngine:
+    # Just enough of AcquisitionEngine for a ProfileExecutor run with no port
+    def __init__(self, first_setpoint):
+        self.current_temp = first_setpoint
+        self.telemetry = TelemetryStore(16)
+        self.telemetry.append(time.monotonic(), first_setpoint, first_setpoint, first_setpoint)
+        self.writes = 0
+        self.result = None
+        self.metrics = MetricsRegistry()
+
+    def send(self, text):
+        self.writes += 1
+
+    def send_setpoint(self, temp):
+        self.writes += 1
+
+    def record_event(self, kind, value=None):
+        pass
+
+    def log(self, message):
+        pass
+
+    def publish(self, event):
+        if event[0] == "profile_finished":
+            self.result = event[2]
+
+
+def bench_profile_jitter(args):
+    # Deadline accuracy of the executor thread at a fine tick interval while
+    # a busy thread competes for the interpreter
+    duration = args.profile_ticks * args.tick_interval
+    schedule = CompiledProfile([(0, 20.0), (duration, 60.0)], tick_interval=args.tick_interval)
+    engine = TimingEngine(schedule.first_setpoint)
+    executor = ProfileExecutor(engine, schedule, start_delay=0, settling=SettlingDetector(hold_time=0))
+    stop_load = threading.Event()
+
+    def load():
+        while not stop_load.is_set():
+            sum(range(1000))
+
+    load_thread = threading.Thread(target=load)
+    load_thread.daemon = True
+    load_thread.start()
+    try:
+        executor.start()
+        executor.thread.join()
+    finally:
+        stop_load.set()
+        load_thread.join()
+    stats = engine.result["stats"]
+    return {
+        "ticks": stats["ticks"],
+        "tick_interval_s": stats["tick_interval"],
+        "jitter_mean_ms": stats["jitter_mean"] * 1000,
+        "jitter_std_ms": stats["jitter_std"] * 1000,
+        "jitter_max_ms": stats["jitter_max"] * 1000,
+        "skipped_ticks": stats["skipped_ticks"],
+        "drift_ms": stats["drift"] * 1000,
+        "setpoints_sent": engine.writes - 1,  # minus the "Profile" command
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args):
+    functions = {
+        "decode": bench_decode,
+        "parse": bench_parse,
+        "latency": bench_latency,
+        "reader": bench_reader,
+        "record_write": bench_record_write,
+        "view_load": bench_view_load,
+        "profile_jitter": bench_profile_jitter,
+    }
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = functions[name](args)
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ingest, record, display and profile paths")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS)
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a smoke run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=500.0, help="frames per second for the latency run")
+    parser.add_argument("--idle-seconds", type=float, default=2.0, help="silent-port time for the reader CPU measurement")
+    parser.add_argument("--tick-interval", type=float, default=0.01, help="profile tick interval for the jitter run")
+    args = parser.parse_args()
+    if args.quick:
+        args.lines, args.frames, args.profile_ticks, args.sizes = 20000, 500, 200, [10000, 100000]
+    else:
+        args.lines, args.frames, args.profile_ticks, args.sizes = 200000, 5000, 2000, [10000, 100000, 1000000]
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
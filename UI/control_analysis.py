@@ -0,0 +1,318 @@
+import sys
+import argparse
+
+import numpy as np
+
+from recording import load_recording
+from settling import DEFAULT_BAND
+from profile_program import ProfileProgram, parse_profile
+
+STEP_THRESHOLD = 0.5  # °C, smaller setpoint changes are ramp quantization
+MIN_HOLD = 30.0       # s, a setpoint kept at least this long is a hold
+STEADY_WINDOW = 30.0  # s at the end of a segment for the steady-state error
+
+SEGMENT_DTYPE = np.dtype([
+    ("start", "f8"), ("end", "f8"), ("kind", "U4"),
+    ("initial_temp", "f8"), ("target", "f8"), ("step", "f8"),
+    ("rise_time", "f8"), ("overshoot", "f8"), ("overshoot_percent", "f8"),
+    ("settling_time", "f8"), ("steady_state_error", "f8"),
+    ("tracking_rms", "f8"), ("profile_rms", "f8"),
+    ("time_above", "f8"), ("time_below", "f8"),
+])
+
+COLUMNS = (
+    # (field, heading, format)
+    ("start", "Start s", "{:.0f}"),
+    ("end", "End s", "{:.0f}"),
+    ("kind", "Kind", "{}"),
+    ("target", "Target °C", "{:.1f}"),
+    ("step", "Step °C", "{:+.1f}"),
+    ("rise_time", "Rise s", "{:.1f}"),
+    ("overshoot", "Overshoot °C", "{:.2f}"),
+    ("settling_time", "Settling s", "{:.1f}"),
+    ("steady_state_error", "SS error °C", "{:+.2f}"),
+    ("tracking_rms", "RMS °C", "{:.2f}"),
+    ("profile_rms", "Profile RMS °C", "{:.2f}"),
+    ("time_above", "Above s", "{:.0f}"),
+    ("time_below", "Below s", "{:.0f}"),
+)
+
+
+def profile_points(profile):
+    # (time, temp) corners of a point list or a ProfileProgram
+    if isinstance(profile, ProfileProgram):
+        return list(profile.breakpoints())
+    return sorted(profile)
+
+
+def profile_reference(points, profile_times):
+    # interpolate_temperature() for a sorted array of profile times, with
+    # the same arithmetic so the 0.1 °C rounding agrees on ties. Each
+    # interval is one slice of the times, so the loop is over the profile's
+    # points, not its samples. A step (two points at the same time) takes
+    # effect at that time.
+    temps = np.empty(len(profile_times))
+    bounds = np.searchsorted(profile_times, [point[0] for point in points], side="left")
+    bounds[0] = np.searchsorted(profile_times, points[0][0], side="right")
+    temps[:bounds[0]] = points[0][1]
+    for (t1, temp1), (t2, temp2), first, stop in zip(points, points[1:], bounds, bounds[1:]):
+        if stop > first:
+            temps[first:stop] = np.round(temp1 + (temp2 - temp1) * ((profile_times[first:stop] - t1) / (t2 - t1)), 1)
+    temps[bounds[-1]:] = points[-1][1]
+    return temps
+
+
+def estimate_profile_start(times, setpoints, points):
+    # Recording time at which the profile timeline started. The executor
+    # first waits for the first point to settle, so the start is found from
+    # the first setpoint after that wait which differs from the first point,
+    # matched with when the profile first leaves its first temperature.
+    first_temp = points[0][1]
+    leave_time = None
+    for (t1, temp1), (t2, temp2) in zip(points, points[1:]):
+        if temp2 != first_temp:
+            change = abs(temp2 - temp1)
+            leave_time = t1 + (t2 - t1) * min(0.05 / change, 1.0)
+            break
+    at_first = np.abs(setpoints - first_temp) < 0.05
+    first = int(np.argmax(at_first))
+    if not at_first[first]:
+        return None
+    if leave_time is None:
+        return times[first]
+    left = first + int(np.argmax(~at_first[first:]))
+    if at_first[left]:
+        return None
+    return times[left] - leave_time
+
+
+def split_segments(times, setpoints, step_threshold=STEP_THRESHOLD, min_hold=MIN_HOLD):
+    # Sample indices where segments start, and their kinds. Runs of a
+    # constant setpoint that last min_hold or longer are segments of their
+    # own; consecutive shorter runs are a ramp's quantization and form one
+    # "ramp" segment. A single run is a "step" when entered by a jump of at
+    # least step_threshold, else a "hold".
+    n = len(times)
+    run_starts = np.concatenate(([0], np.flatnonzero(np.diff(setpoints) != 0) + 1))
+    run_ends = np.append(run_starts[1:], n - 1)
+    long_run = times[run_ends] - times[run_starts] >= min_hold
+    jump = np.zeros(len(run_starts))
+    jump[1:] = np.abs(setpoints[run_starts[1:]] - setpoints[run_starts[1:] - 1])
+    is_step = jump >= step_threshold
+    boundary = np.ones(len(run_starts), dtype=bool)
+    boundary[1:] = is_step[1:] | long_run[1:] | long_run[:-1]
+    first_runs = np.flatnonzero(boundary)
+    run_counts = np.diff(np.append(first_runs, len(run_starts)))
+    kinds = np.where(run_counts > 1, "ramp", np.where(is_step[first_runs], "step", "hold"))
+    return run_starts[first_runs], kinds
+
+
+def analyze(times, inside, setpoints, band=DEFAULT_BAND, profile=None, profile_start=None,
+            step_threshold=STEP_THRESHOLD, min_hold=MIN_HOLD, steady_window=STEADY_WINDOW):
+    # Control performance of a recording, per setpoint segment. Everything
+    # is whole-array NumPy (reduceat over the segment boundaries, per-segment
+    # values broadcast back with repeat), so the cost is a few passes over
+    # the samples whatever the number of segments.
+    #
+    # Errors are inside - setpoint, with the setpoint the board reported in
+    # each sample (the profile's reference when the recording has no
+    # setpoint column). With a profile, profile_rms is measured against
+    # profile_reference() from profile_start on (estimated when not given);
+    # a fixed timeline is assumed, so "settle" holds that ended early shift
+    # everything after them.
+    #
+    # Returns (segments, summary): a SEGMENT_DTYPE array and a dict for the
+    # whole recording. Metrics that do not apply are NaN: rise time and
+    # overshoot are only defined for steps larger than the band, settling
+    # time is NaN when the segment ends outside the band.
+    times = np.asarray(times, dtype=np.float64)
+    inside = np.asarray(inside, dtype=np.float64)
+    setpoints = np.asarray(setpoints, dtype=np.float64)
+    valid = np.isfinite(times) & np.isfinite(inside)
+    if not valid.all():
+        times, inside, setpoints = times[valid], inside[valid], setpoints[valid]
+
+    if profile is not None:
+        points = profile_points(profile)
+        if not points:
+            raise ValueError("The profile has no points.")
+        no_setpoints = np.isnan(setpoints).all()
+        if profile_start is None:
+            profile_start = 0.0 if no_setpoints else estimate_profile_start(times, setpoints, points)
+        if profile_start is not None and no_setpoints:
+            setpoints = profile_reference(points, times - profile_start)
+            setpoints[(times < profile_start) | (times > profile_start + points[-1][0])] = np.nan
+    known = np.isfinite(setpoints)
+    if not known.any():
+        raise ValueError("The recording has no setpoint column; give the profile it followed.")
+    if not known.all():
+        times, inside, setpoints = times[known], inside[known], setpoints[known]
+
+    n = len(times)
+    starts, kinds = split_segments(times, setpoints, step_threshold, min_hold)
+    ends = np.append(starts[1:], n)  # Exclusive
+    lengths = ends - starts
+    last = ends - 1
+    segment_start = times[starts]
+    segment_end = times[np.append(starts[1:], n - 1)]
+    # Each sample stands for the time until the next one
+    durations = np.empty(n)
+    durations[:-1] = np.diff(times)
+    durations[-1] = 0.0
+    error = inside - setpoints
+
+    segments = np.zeros(len(starts), dtype=SEGMENT_DTYPE)
+    segments["start"] = segment_start
+    segments["end"] = segment_end
+    segments["kind"] = kinds
+    segments["initial_temp"] = inside[starts]
+    segments["target"] = setpoints[last]
+    segments["step"] = setpoints[starts] - setpoints[np.maximum(starts - 1, 0)]
+
+    # Step response, against the setpoint entered at the step. Progress
+    # thresholds are compared in the step's direction, so one signed
+    # distance serves both rising and falling steps.
+    target = setpoints[starts]
+    amplitude = target - inside[starts]
+    responding = (kinds == "step") & (np.abs(amplitude) > band)
+    direction = np.where(amplitude < 0, -1.0, 1.0)
+    toward = (inside - np.repeat(target, lengths)) * np.repeat(direction, lengths)  # <= 0 until the target is reached
+    remaining = np.abs(amplitude)
+    first_10 = first_at_or_above(toward, np.repeat(-0.9 * remaining, lengths), starts, ends)
+    first_90 = first_at_or_above(toward, np.repeat(-0.1 * remaining, lengths), starts, ends)
+    rose = responding & (first_10 < ends) & (first_90 < ends)
+    segments["rise_time"] = np.where(rose, times[np.minimum(first_90, n - 1)] - times[np.minimum(first_10, n - 1)], np.nan)
+    segments["overshoot"] = np.where(responding, np.maximum(np.maximum.reduceat(toward, starts), 0.0), np.nan)
+    segments["overshoot_percent"] = segments["overshoot"] / np.where(responding, remaining, np.nan) * 100
+
+    # Settled from the sample after the last one outside the band
+    outside_band = np.flatnonzero(np.abs(error) > band + 1e-9)
+    if len(outside_band):
+        position = np.searchsorted(outside_band, ends) - 1
+        last_out = np.where(position >= 0, outside_band[np.maximum(position, 0)], -1)
+    else:
+        # Always in band: every segment settles at its first sample
+        last_out = np.full(len(starts), -1)
+    last_out = np.where(last_out >= starts, last_out, -1)
+    settled_at = np.where(last_out < 0, starts, np.minimum(last_out + 1, n - 1))
+    segments["settling_time"] = np.where(last_out < last, times[settled_at] - segment_start, np.nan)
+
+    # Sums over any index range come from running totals
+    error_total = np.concatenate(([0.0], np.cumsum(error)))
+    steady_first = np.maximum(np.searchsorted(times, segment_end - steady_window, side="left"), starts)
+    steady_first = np.minimum(steady_first, last)
+    segments["steady_state_error"] = (error_total[ends] - error_total[steady_first]) / (ends - steady_first)
+
+    squared = error * error
+    segments["tracking_rms"] = np.sqrt(np.add.reduceat(squared, starts) / lengths)
+    segments["time_above"] = np.add.reduceat(durations * (error > band + 1e-9), starts)
+    segments["time_below"] = np.add.reduceat(durations * (error < -band - 1e-9), starts)
+
+    summary = {
+        "samples": n,
+        "duration": float(times[-1] - times[0]),
+        "segments": len(starts),
+        "band": band,
+        "tracking_rms": float(np.sqrt(squared.mean())),
+        "time_above": float(segments["time_above"].sum()),
+        "time_below": float(segments["time_below"].sum()),
+        "profile_start": profile_start,
+        "profile_rms": None,
+    }
+    segments["profile_rms"] = np.nan
+    if profile is not None and profile_start is not None:
+        # Only the samples the profile's timeline covers
+        first = np.searchsorted(times, profile_start, side="left")
+        stop = np.searchsorted(times, profile_start + points[-1][0], side="right")
+        if stop > first:
+            profile_error = inside[first:stop] - profile_reference(points, times[first:stop] - profile_start)
+            squared_total = np.concatenate(([0.0], np.cumsum(profile_error * profile_error)))
+            covered_first = np.clip(starts, first, stop) - first
+            covered_stop = np.clip(ends, first, stop) - first
+            covered = covered_stop - covered_first
+            with np.errstate(divide="ignore", invalid="ignore"):
+                segments["profile_rms"] = np.where(covered > 0, np.sqrt((squared_total[covered_stop] - squared_total[covered_first]) / covered), np.nan)
+            summary["profile_rms"] = float(np.sqrt(squared_total[-1] / (stop - first)))
+    return segments, summary
+
+
+def first_at_or_above(values, thresholds, starts, ends):
+    # Index of the first sample of each segment with value >= threshold,
+    # or the segment's end when there is none
+    hits = np.flatnonzero(values >= thresholds)
+    position = np.searchsorted(hits, starts)
+    found = hits[np.minimum(position, len(hits) - 1)] if len(hits) else ends
+    return np.where((position < len(hits)) & (found < ends), found, ends)
+
+
+def analyze_file(file_path, profile=None, **options):
+    relative_times, inside_temps, _, set_inside_temps = load_recording(file_path)
+    if len(relative_times) == 0:
+        raise ValueError("No valid temperature data found in the file.")
+    return analyze(relative_times, inside_temps, set_inside_temps, profile=profile, **options)
+
+
+def format_value(value, template):
+    if isinstance(value, (float, np.floating)) and np.isnan(value):
+        return "-"
+    return template.format(value)
+
+
+def segment_rows(segments):
+    return [[format_value(segment[field], template) for field, _, template in COLUMNS] for segment in segments]
+
+
+def format_table(segments):
+    headings = [heading for _, heading, _ in COLUMNS]
+    rows = segment_rows(segments)
+    widths = [max([len(heading)] + [len(row[i]) for row in rows]) for i, heading in enumerate(headings)]
+    lines = ["  ".join(text.rjust(width) for text, width in zip(line, widths)) for line in [headings] + rows]
+    return "\n".join(lines) + "\n"
+
+
+def format_summary(summary):
+    text = (f"{summary['samples']} samples over {summary['duration']:.0f} s, {summary['segments']} segments; "
+            f"tracking RMS {summary['tracking_rms']:.2f} °C, outside ±{summary['band']:g} °C: "
+            f"{summary['time_above']:.0f} s above, {summary['time_below']:.0f} s below")
+    if summary["profile_rms"] is not None:
+        text += f"; profile RMS {summary['profile_rms']:.2f} °C (profile started at {summary['profile_start']:.0f} s)"
+    return text + "\n"
+
+
+def save_csv(segments, file_path):
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(",".join(SEGMENT_DTYPE.names) + "\n")
+        for segment in segments.tolist():
+            f.write(",".join(str(value) if not isinstance(value, float) else f"{value:.6g}" for value in segment) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Control performance of a recording, per setpoint segment")
+    parser.add_argument("recording", help="text or binary (.pltr) recording")
+    parser.add_argument("--profile", help="profile file the run followed, for the RMS error against the intended profile")
+    parser.add_argument("--profile-start", type=float, help="recording time (s) the profile timeline started at (default: estimated)")
+    parser.add_argument("--band", type=float, default=DEFAULT_BAND, help="°C either side of the setpoint that counts as on target")
+    parser.add_argument("--step-threshold", type=float, default=STEP_THRESHOLD, help="smallest setpoint change (°C) treated as a step")
+    parser.add_argument("--min-hold", type=float, default=MIN_HOLD, help="seconds a setpoint has to be kept to count as a hold")
+    parser.add_argument("--steady-window", type=float, default=STEADY_WINDOW, help="seconds at the end of a segment for the steady-state error")
+    parser.add_argument("--csv", help="also write the segment table here")
+    args = parser.parse_args(argv)
+    try:
+        profile = None
+        if args.profile:
+            with open(args.profile, "r", encoding="utf-8") as f:
+                profile = parse_profile(f.read())
+        segments, summary = analyze_file(args.recording, profile=profile, profile_start=args.profile_start, band=args.band,
+                                         step_threshold=args.step_threshold, min_hold=args.min_hold, steady_window=args.steady_window)
+        if args.csv:
+            save_csv(segments, args.csv)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    sys.stdout.write(format_table(segments))
+    sys.stdout.write(format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+from metrics import Histogram, RateTracker
+
+COLUMNS = (
+    ("metric", "Metric", 230),
+    ("value", "Value", 150),
+    ("rate", "Per second", 90),
+    ("p99", "p50 / p99 / max (ms)", 160),
+)
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value * 1000:.2f}"
+
+
+class DebugPanelWindow:
+    # Live view of a MetricsRegistry, refreshed once a second from a
+    # snapshot (so it adds nothing to the paths being measured), plus the
+    # switch for the sampling profiler.
+    def __init__(self, root, registry, profiler, refresh_ms=1000):
+        self.root = root
+        self.registry = registry
+        self.profiler = profiler
+        self.refresh_ms = refresh_ms
+        self.refresh_job = None
+        self.rates = RateTracker()
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Debug")
+        self.window.geometry("660x480")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.tree = ttk.Treeview(self.window, columns=[c[0] for c in COLUMNS], show="headings", height=12)
+        for name, heading, width in COLUMNS:
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width, anchor="w" if name == "metric" else "e")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        controls = tk.Frame(self.window)
+        controls.pack(fill="x", padx=10)
+        self.profiler_button = ttk.Button(controls, text="Start Profiler", command=self.toggle_profiler, width=16)
+        self.profiler_button.pack(side=tk.LEFT)
+        ttk.Button(controls, text="Save Stacks", command=self.save_stacks, width=14).pack(side=tk.LEFT, padx=(5, 0))
+        self.profiler_label = ttk.Label(controls, text="")
+        self.profiler_label.pack(side=tk.LEFT, padx=(10, 0))
+
+        self.profile_text = tk.Text(self.window, height=8, font=("Courier", 9), state="disabled")
+        self.profile_text.pack(fill="x", padx=10, pady=(5, 10))
+
+        self.update_profiler_controls()
+        self.refresh()
+
+    def exists(self):
+        return self.window is not None and self.window.winfo_exists()
+
+    def lift(self):
+        self.window.focus_set()
+        self.window.lift()
+
+    def close(self):
+        if self.refresh_job is not None:
+            self.root.after_cancel(self.refresh_job)
+            self.refresh_job = None
+        if self.window is not None:
+            self.window.destroy()
+        self.window = None
+
+    def refresh(self):
+        snapshot = self.registry.snapshot()
+        rates = self.rates.update(snapshot)
+        gauges = {name for name, metric in self.registry.metrics.items() if getattr(metric, "kind", None) == "gauge"}
+        for name, value in sorted(snapshot["metrics"].items()):
+            rate = rates.get(name)
+            rate = "" if rate is None or name in gauges else f"{rate:.1f}"
+            if isinstance(self.registry.metrics.get(name), Histogram):
+                latency = "-" if not value["count"] else f"{format_ms(value['p50'])} / {format_ms(value['p99'])} / {format_ms(value['max'])}"
+                row = (name, format_value(value["count"]), rate, latency)
+            else:
+                row = (name, format_value(value), rate, "")
+            if self.tree.exists(name):
+                self.tree.item(name, values=row)
+            else:
+                self.tree.insert("", tk.END, iid=name, values=row)
+        if self.profiler.running:
+            self.show_top_functions()
+        self.refresh_job = self.root.after(self.refresh_ms, self.refresh)
+
+    def update_profiler_controls(self):
+        running = self.profiler.running
+        self.profiler_button.config(text="Stop Profiler" if running else "Start Profiler")
+        self.profiler_label.config(text=f"{self.profiler.samples} samples" + (" (running)" if running else ""))
+
+    def toggle_profiler(self):
+        self.profiler.toggle()
+        self.update_profiler_controls()
+        self.show_top_functions()
+
+    def show_top_functions(self):
+        self.update_profiler_controls()
+        lines = [f"{share * 100:5.1f}%  {function}" for function, share in self.profiler.top_functions(limit=8)]
+        self.profile_text.config(state="normal")
+        self.profile_text.delete("1.0", tk.END)
+        self.profile_text.insert("1.0", "\n".join(lines) if lines else "No samples yet.")
+        self.profile_text.config(state="disabled")
+
+    def save_stacks(self):
+        if not self.profiler.samples:
+            messagebox.showinfo("Info", "Start the profiler to collect samples first.", parent=self.window)
+            self.lift()
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".collapsed", filetypes=[("Collapsed stacks", "*.collapsed"), ("All files", "*.*")], title="Save profiler stacks", parent=self.window)
+        if not file_path:
+            self.lift()
+            return
+        try:
+            self.profiler.save(file_path)
+        except OSError as e:
+            messagebox.showerror("File Error", f"Failed to save stacks: {str(e)}", parent=self.window)
+        self.lift()
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+def minmax_bins(times, values, t0, t1, bins):
+    # Min/max of each channel per time bin over [t0, t1]. `values` is a
+    # (k, n) array or k arrays of length n sharing `times`, which must be
+    # sorted. Returns (bin_times, mins, maxs) with mins/maxs shaped (k, m);
+    # empty bins are dropped. With few enough samples the data is returned
+    # as is.
+    if len(times) == 0 or bins <= 0:
+        empty = np.empty((len(values), 0))
+        return np.empty(0), empty, empty
+    if len(times) <= 2 * bins:
+        stacked = np.vstack(values)
+        return np.asarray(times), stacked, stacked
+    edges = np.linspace(t0, t1, bins + 1)
+    starts = np.searchsorted(times, edges[:-1], side="left")
+    stops = np.searchsorted(times, edges[1:], side="left")
+    stops[-1] = len(times)
+    nonempty = stops > starts
+    starts = starts[nonempty]
+    mins = np.vstack([np.minimum.reduceat(channel, starts) for channel in values])
+    maxs = np.vstack([np.maximum.reduceat(channel, starts) for channel in values])
+    bin_times = (edges[:-1][nonempty] + edges[1:][nonempty]) / 2
+    return bin_times, mins, maxs
+
+
+def interleave_minmax(bin_times, mins, maxs):
+    # Turn min/max bins into a single polyline (min then max per bin) that
+    # preserves the envelope when plotted
+    times = np.repeat(bin_times, 2)
+    values = np.empty((mins.shape[0], 2 * mins.shape[1]))
+    values[:, 0::2] = mins
+    values[:, 1::2] = maxs
+    return times, values
+
+
+class ArraySource:
+    # Recording already in memory. window() slices (views) the visible range,
+    # one sample either side so lines run to the axes edges, and min/max
+    # bins it. RecordingIndex offers the same interface for files that are
+    # read on demand.
+    def __init__(self, times, channels):
+        self.times = np.asarray(times)
+        self.channels = [np.asarray(channel) for channel in channels]
+
+    def time_limits(self):
+        if len(self.times) == 0:
+            return None
+        return float(self.times[0]), float(self.times[-1])
+
+    def value_limits(self):
+        finite = [(np.nanmin(channel), np.nanmax(channel)) for channel in self.channels if np.isfinite(channel).any()]
+        if not finite:
+            return None
+        return min(low for low, _ in finite), max(high for _, high in finite)
+
+    def window(self, t0, t1, bins):
+        times = self.times
+        first = max(np.searchsorted(times, t0, side="left") - 1, 0)
+        last = min(np.searchsorted(times, t1, side="right") + 1, len(times))
+        window_times = times[first:last]
+        window = [channel[first:last] for channel in self.channels]
+        if len(window_times) == 0:
+            return minmax_bins(window_times, window, t0, t1, bins)
+        return minmax_bins(window_times, window, window_times[0], window_times[-1], bins)
+
+
+class MinMaxDecimator:
+    # Feeds matplotlib lines from a full-resolution source (ArraySource or
+    # RecordingIndex) at no more than max_points points per line for the
+    # visible x range. It re-bins on every xlim change (toolbar
+    # zoom/pan/home), so detail appears as you zoom in while each redraw
+    # stays a few thousand points. Min/max bins keep spikes and the envelope
+    # that plain striding would drop.
+    def __init__(self, ax, source, lines, max_points=4000):
+        self.ax = ax
+        self.source = source
+        self.lines = lines
+        self.bins = max(max_points // 2, 1)
+        self.view = None
+        # A plain closure: the callback registry only weakly references
+        # bound methods
+        ax.callbacks.connect("xlim_changed", lambda ax: self.update())
+
+    def update(self):
+        x0, x1 = self.ax.get_xlim()
+        if self.view == (x0, x1):
+            return
+        self.view = (x0, x1)
+        bin_times, mins, maxs = self.source.window(x0, x1, self.bins)
+        if mins is maxs:
+            plot_times, values = bin_times, mins
+        else:
+            plot_times, values = interleave_minmax(bin_times, mins, maxs)
+        for line, channel in zip(self.lines, values):
+            line.set_data(plot_times, channel)
@@ -0,0 +1,167 @@
+import os
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+COLUMNS = (
+    ("port", "Port", 110),
+    ("status", "Status", 130),
+    ("inside", "Inside °C", 75),
+    ("outside", "Outside °C", 75),
+    ("set", "Set °C", 65),
+    ("profile", "Profile", 70),
+    ("recording", "Recording", 70),
+)
+
+
+class DeviceOverviewWindow:
+    # One row per controller in the SessionManager. Rows are refreshed from
+    # each engine's latest values a few times a second, so the cost does not
+    # depend on the sample rate. Actions apply to every selected row.
+    #
+    # Session events are drained by the main window's poll (SessionManager
+    # .poll), so STOP, disconnects and write errors are handled while this
+    # window is closed; it only displays the resulting status.
+    def __init__(self, root, manager, list_ports, get_profile, tick_interval=1.0, refresh_ms=500):
+        self.root = root
+        self.manager = manager
+        self.list_ports = list_ports
+        self.get_profile = get_profile
+        self.tick_interval = tick_interval
+        self.refresh_ms = refresh_ms
+        self.refresh_job = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Devices")
+        self.window.geometry("640x360")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        controls = tk.Frame(self.window)
+        controls.pack(fill="x", padx=10, pady=(10, 5))
+        self.port_var = tk.StringVar()
+        self.port_menu = ttk.Combobox(controls, textvariable=self.port_var, width=18, state="readonly", postcommand=self.update_ports)
+        self.port_menu.pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(controls, text="Add", command=self.add_device, width=8).pack(side=tk.LEFT)
+        ttk.Button(controls, text="Remove", command=self.remove_selected, width=8).pack(side=tk.LEFT, padx=(5, 0))
+
+        self.tree = ttk.Treeview(self.window, columns=[c[0] for c in COLUMNS], show="headings", selectmode="extended")
+        for name, heading, width in COLUMNS:
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width, anchor="center")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10)
+
+        actions = tk.Frame(self.window)
+        actions.pack(fill="x", padx=10, pady=(5, 10))
+        ttk.Button(actions, text="Send Profile", command=self.start_profiles).pack(side=tk.LEFT)
+        ttk.Button(actions, text="Stop Profile", command=self.stop_profiles).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(actions, text="Record", command=self.start_recordings).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(actions, text="Stop Recording", command=self.stop_recordings).pack(side=tk.LEFT, padx=(5, 0))
+
+        # Sessions outlive the window; reopening shows the devices still running
+        for session in self.manager:
+            self.insert_row(session.port)
+        self.update_ports()
+        self.refresh()
+
+    def exists(self):
+        return self.window is not None and self.window.winfo_exists()
+
+    def lift(self):
+        self.window.focus_set()
+        self.window.lift()
+
+    def close(self):
+        if self.refresh_job is not None:
+            self.root.after_cancel(self.refresh_job)
+            self.refresh_job = None
+        if self.window is not None:
+            self.window.destroy()
+        self.window = None
+
+    def show_error(self, title, message):
+        messagebox.showerror(title, message, parent=self.window)
+        self.lift()
+
+    def update_ports(self):
+        ports = [port for port in self.list_ports() if port not in self.manager]
+        self.port_menu['values'] = ports
+        if self.port_var.get() not in ports:
+            self.port_menu.set(ports[0] if ports else "")
+
+    def selected_ports(self):
+        return list(self.tree.selection())
+
+    def add_device(self):
+        port = self.port_var.get()
+        if not port:
+            self.show_error("Error", "Please select a COM port.")
+            return
+        try:
+            self.manager.add(port)
+        except Exception as e:
+            self.show_error("Connection Error", str(e))
+            return
+        self.insert_row(port)
+        self.update_ports()
+
+    def insert_row(self, port):
+        self.tree.insert("", tk.END, iid=port, values=(port,) + ("",) * (len(COLUMNS) - 1))
+
+    def remove_selected(self):
+        for port in self.selected_ports():
+            self.manager.remove(port)
+            self.tree.delete(port)
+        self.update_ports()
+
+    def start_profiles(self):
+        ports = self.selected_ports()
+        if not ports:
+            self.show_error("Error", "Select one or more devices.")
+            return
+        profile = self.get_profile()
+        if not profile:
+            self.show_error("Error", "No profile points to send. Create a profile in Temperature Profile Setup first.")
+            return
+        for port in ports:
+            try:
+                self.manager.get(port).start_profile(profile, self.tick_interval)
+            except Exception as e:
+                self.show_error("Profile Error", f"{port}: {e}")
+
+    def stop_profiles(self):
+        self.manager.stop_profiles(self.selected_ports())
+
+    def start_recordings(self):
+        ports = self.selected_ports()
+        if not ports:
+            self.show_error("Error", "Select one or more devices.")
+            return
+        directory = filedialog.askdirectory(title="Folder for device recordings", parent=self.window)
+        if not directory:
+            return
+        for port in ports:
+            session = self.manager.get(port)
+            name = port.replace("/", "_").strip("_") + ".txt"
+            try:
+                session.start_recording(os.path.join(directory, name))
+            except Exception as e:
+                self.show_error("File Error", f"{port}: {e}")
+
+    def stop_recordings(self):
+        for port in self.selected_ports():
+            self.manager.get(port).stop_recording()
+
+    def refresh(self):
+        try:
+            for session in self.manager:
+                engine = session.engine
+                self.tree.item(session.port, values=(
+                    session.port,
+                    session.status,
+                    "" if engine.current_temp is None else f"{engine.current_temp:.1f}",
+                    "" if engine.current_outside_temp is None else f"{engine.current_outside_temp:.1f}",
+                    "" if engine.current_device_setpoint is None else f"{engine.current_device_setpoint:.1f}",
+                    "Running" if session.profile_running else "",
+                    "Yes" if engine.recording else "",
+                ))
+        finally:
+            self.refresh_job = self.root.after(self.refresh_ms, self.refresh)
@@ -0,0 +1,185 @@
+import heapq
+import itertools
+import selectors
+import socket
+import threading
+import time
+
+
+class DeviceScheduler:
+    # One thread serving any number of devices: it waits on every engine's
+    # serial fd at once (selectors), reads whichever is readable through
+    # AcquisitionEngine.poll_serial(), and runs the deadline timers of every
+    # ProfileExecutor started with start(scheduler) from a single heap.
+    # Ports without a selectable fd (Windows) are polled every
+    # poll_interval instead.
+    #
+    # Executor steps run on this thread; their writes only queue for each
+    # engine's SerialWriter, so a stalled device can't hold up the others.
+    def __init__(self, poll_interval=0.005, idle_timeout=1.0):
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.engines = []
+        self.engines_changed = False
+        self.pending_executors = []
+        self.timers = []  # heap of (deadline, sequence, executor)
+        self.sequence = itertools.count()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.wake_receiver, self.wake_sender = socket.socketpair()
+        self.wake_receiver.setblocking(False)
+        self.wake_sender.setblocking(False)
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        self.thread = None
+
+    def close(self):
+        self.stop()
+        self.wake_receiver.close()
+        self.wake_sender.close()
+
+    def wake(self):
+        try:
+            self.wake_sender.send(b"\x00")
+        except OSError:
+            pass  # Buffer full (already woken) or closed
+
+    def add_engine(self, engine):
+        with self.lock:
+            if engine not in self.engines:
+                self.engines = self.engines + [engine]
+            self.engines_changed = True
+        self.wake()
+
+    def remove_engine(self, engine):
+        with self.lock:
+            self.engines = [e for e in self.engines if e is not engine]
+            self.engines_changed = True
+        self.wake()
+
+    def add_executor(self, executor):
+        with self.lock:
+            self.pending_executors.append(executor)
+        self.wake()
+
+    def run(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self.wake_receiver, selectors.EVENT_READ, None)
+        polled = []
+        try:
+            while not self.stop_event.is_set():
+                with self.lock:
+                    engines_changed = self.engines_changed
+                    self.engines_changed = False
+                    engines = self.engines
+                    pending = self.pending_executors
+                    self.pending_executors = []
+                if engines_changed:
+                    polled = self.register_engines(selector, engines)
+                for executor in pending:
+                    self.schedule(executor, self.guarded(executor, executor.begin))
+
+                timeout = self.idle_timeout
+                if self.timers:
+                    timeout = min(timeout, max(self.timers[0][0] - time.monotonic(), 0))
+                if polled:
+                    timeout = min(timeout, self.poll_interval)
+
+                woken = False
+                for key, _ in selector.select(timeout):
+                    if key.data is None:
+                        self.drain_wake()
+                        woken = True
+                    elif not key.data.poll_serial(True):
+                        self.remove_engine(key.data)
+                for engine in polled:
+                    if not engine.poll_serial():
+                        self.remove_engine(engine)
+
+                if woken:
+                    self.reap_stopped()
+                self.run_timers()
+        finally:
+            selector.close()
+
+    def register_engines(self, selector, engines):
+        # Rebuilt from scratch on every change so a closed fd whose number
+        # has been reused by a newly opened port never clashes
+        for key in list(selector.get_map().values()):
+            if key.data is not None:
+                try:
+                    selector.unregister(key.fileobj)
+                except (KeyError, ValueError, OSError):
+                    pass
+        polled = []
+        for engine in engines:
+            port = engine.serial_port
+            try:
+                fd = port.fileno()
+            except (AttributeError, OSError, ValueError):
+                fd = None
+            if fd is None:
+                polled.append(engine)
+                continue
+            try:
+                selector.register(fd, selectors.EVENT_READ, engine)
+            except (KeyError, ValueError, OSError):
+                polled.append(engine)
+        return polled
+
+    def drain_wake(self):
+        try:
+            while self.wake_receiver.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def guarded(self, executor, function, *args):
+        try:
+            return function(*args)
+        except Exception as e:
+            executor.finish(error=e)
+            return None
+
+    def schedule(self, executor, deadline):
+        if deadline is not None:
+            heapq.heappush(self.timers, (deadline, next(self.sequence), executor))
+
+    def reap_stopped(self):
+        # Stop requests finish the executor right away instead of at its next
+        # deadline
+        stopped = [entry for entry in self.timers if entry[2].stop_event.is_set()]
+        if not stopped:
+            return
+        self.timers = [entry for entry in self.timers if not entry[2].stop_event.is_set()]
+        heapq.heapify(self.timers)
+        for _, _, executor in stopped:
+            executor.finish(stopped=True)
+
+    def run_timers(self):
+        timers = self.timers
+        now = time.monotonic()
+        while timers and timers[0][0] <= now:
+            deadline, _, executor = heapq.heappop(timers)
+            if executor.stop_event.is_set():
+                executor.finish(stopped=True)
+            else:
+                self.schedule(executor, self.guarded(executor, executor.step, time.monotonic() - deadline))
+            now = time.monotonic()
@@ -0,0 +1,246 @@
+import os
+import sys
+import tty
+import time
+import random
+import argparse
+import threading
+
+# Hardware-free stand-in for the STM32 board. It opens a pseudo-terminal and
+# speaks the firmware protocol over it:
+#   - every sample period it sends send_temps_via_usb()'s 25-byte frame,
+#     "%.1lf, %.1lf, %.1lf\n\r" NUL padded to 25 bytes;
+#   - "Profile" puts it in profile-following mode, a number sets the inside
+#     setpoint (unclamped, like string_to_double() in usb_helpers.c);
+#   - a simulated button press while following a profile sends the 10-byte
+#     "STOP\n" message and leaves profile mode.
+# The plant is a first-order thermal model driven by the same PID structure
+# as pid.c.
+FRAME_SIZE = 25
+STOP_FRAME = b"STOP\n".ljust(10, b"\x00")
+
+# pid.h
+KP = 4.5
+KI = 0.01
+KD = 550
+POINTS_FOR_KD = 50
+KI_INTRODUCTION_POINT = 0.90
+INTEGRAL_MAX_DEVIATION = 2
+INTEGRAL_TEMP_TABLE = [-15, -10, -5, 0, 5, 10, 15, 20, 25, 30, 35, 40]
+INTEGRAL_PART_TABLE = [-12, -8, -4, 0, 1.5, 3, 4.5, 6, 7.5, 9, 10.5, 12]
+
+# lt8722.h output limits
+MAX_POS_VOUT = 10.14
+MAX_NEG_VOUT = -10.50
+
+
+def build_frame(inside_temp, outside_temp, set_inside_temp):
+    # snprintf(buf, 25, ...) truncates to 24 characters plus the terminator
+    text = f"{inside_temp:.1f}, {outside_temp:.1f}, {set_inside_temp:.1f}\n\r".encode()[:FRAME_SIZE - 1]
+    return text.ljust(FRAME_SIZE, b"\x00")
+
+
+class PidController:
+    # Port of compute_pid_output() and its helpers from pid.c. dt is the
+    # control period; the firmware runs at dt = 1 s.
+    def __init__(self, dt=1.0):
+        self.dt = dt
+        self.integral_on = False
+        self.integral = 0.0
+        self.integral_estimate = 0.0
+        self.previous_error = [0.0] * POINTS_FOR_KD
+        self.previous_set_temp = 0.0
+        self.points_collected = 0
+
+    def assign_integral_value(self, set_temp, outside_temp):
+        temp_diff = set_temp - outside_temp
+        previous_closeness = 999
+        for i in range(len(INTEGRAL_TEMP_TABLE)):
+            closeness = abs(int(temp_diff - INTEGRAL_TEMP_TABLE[i]))
+            if closeness < previous_closeness:
+                previous_closeness = closeness
+            else:
+                return INTEGRAL_PART_TABLE[i - 1] / KI
+        return 0
+
+    def derivative(self, error):
+        history = self.previous_error
+        history.pop(0)
+        history.append(error)
+        if self.points_collected < POINTS_FOR_KD:
+            earliest_error = history[POINTS_FOR_KD - 1 - self.points_collected]
+        else:
+            earliest_error = history[0]
+        return (history[-1] - earliest_error) / (POINTS_FOR_KD * self.dt)
+
+    def compute(self, current_temp, set_temp, outside_temp):
+        if set_temp != self.previous_set_temp:
+            self.previous_error = [0.0] * POINTS_FOR_KD
+            self.points_collected = 0
+            self.integral_on = False
+            self.integral = 0.0
+        self.previous_set_temp = set_temp
+        error = set_temp - current_temp
+
+        # pid.c uses the integer abs() here; keep the same truncation
+        if set_temp and abs(int(current_temp - set_temp)) / set_temp <= 1 - KI_INTRODUCTION_POINT and not self.integral_on:
+            self.integral_estimate = self.assign_integral_value(set_temp, outside_temp)
+            self.integral = self.integral_estimate
+            self.integral_on = True
+
+        if self.integral_on and abs(int(KI * self.integral_estimate - KI * (self.integral + error * self.dt))) <= INTEGRAL_MAX_DEVIATION:
+            self.integral += error * self.dt
+
+        output = KP * error + KI * self.integral + KD * self.derivative(error)
+        self.points_collected += 1
+        return output
+
+
+class ThermalPlant:
+    # First-order model: the chamber leaks towards ambient and the Peltier
+    # moves heat proportionally to its drive voltage. Readings are quantized
+    # to the TMP1075's 0.0625 °C steps plus a little noise.
+    def __init__(self, ambient=22.0, inside=22.0, heat_rate=0.08, leak_rate=0.01, noise=0.03, seed=None):
+        self.ambient = ambient
+        self.inside = inside
+        self.heat_rate = heat_rate
+        self.leak_rate = leak_rate
+        self.noise = noise
+        self.random = random.Random(seed)
+
+    def step(self, vout, dt):
+        vout = max(MAX_NEG_VOUT, min(MAX_POS_VOUT, vout))
+        self.inside += (self.heat_rate * vout - self.leak_rate * (self.inside - self.ambient)) * dt
+
+    def read(self, temp):
+        noisy = temp + self.random.gauss(0, self.noise)
+        return round(noisy / 0.0625) * 0.0625
+
+
+class PeltierSimulator:
+    def __init__(self, sample_rate=1.0, time_scale=1.0, ambient=22.0, seed=None):
+        # sample_rate: frames per second on the wire (the real board sends 1).
+        # time_scale: simulated plant seconds per wall-clock second, to run
+        # long thermal profiles quickly.
+        self.sample_rate = sample_rate
+        self.time_scale = time_scale
+        self.plant = ThermalPlant(ambient=ambient, inside=ambient, seed=seed)
+        self.pid = PidController(dt=time_scale / sample_rate)
+        self.set_temp = round(ambient, 1)
+        self.is_following_profile = False
+        self.frames_sent = 0
+        self.commands_received = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        tty.setraw(self.master_fd)
+        self.port_name = os.ttyname(self.slave_fd)
+        self.rx_buffer = bytearray()
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def close(self):
+        self.stop()
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def press_button(self):
+        # Mirrors HAL_GPIO_EXTI_Falling_Callback: any front-panel press
+        # during a profile aborts it and tells the host
+        with self.lock:
+            if self.is_following_profile:
+                self.is_following_profile = False
+                os.write(self.master_fd, STOP_FRAME)
+
+    def handle_command(self, command):
+        self.commands_received.append(command)
+        if command.startswith(b"P"):  # Stands for Profile
+            self.is_following_profile = True
+            return
+        try:
+            self.set_temp = float(command)
+        except ValueError:
+            pass
+
+    def receive(self):
+        try:
+            data = os.read(self.master_fd, 4096)
+        except (BlockingIOError, OSError):
+            return
+        self.rx_buffer += data
+        while True:
+            end = self.rx_buffer.find(b"\n")
+            if end < 0:
+                break
+            command = bytes(self.rx_buffer[:end]).strip(b"\r\x00 ")
+            del self.rx_buffer[:end + 1]
+            if command:
+                self.handle_command(command)
+
+    def tick(self):
+        dt = self.time_scale / self.sample_rate
+        inside = self.plant.read(self.plant.inside)
+        outside = self.plant.read(self.plant.ambient)
+        vout = self.pid.compute(inside, self.set_temp, outside)
+        self.plant.step(vout, dt)
+        with self.lock:
+            os.write(self.master_fd, build_frame(inside, outside, self.set_temp))
+        self.frames_sent += 1
+
+    def run(self):
+        os.set_blocking(self.master_fd, False)
+        period = 1.0 / self.sample_rate
+        deadline = time.monotonic()
+        while not self.stop_event.is_set():
+            # Same order as the firmware main loop: sample, drive, report, then
+            # pick up whatever the host sent
+            self.tick()
+            self.receive()
+            deadline += period
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                self.stop_event.wait(remaining)
+            elif remaining < -1.0:
+                deadline = time.monotonic()  # Fell far behind, don't burst
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated Peltier controller on a pseudo-terminal")
+    parser.add_argument("--rate", type=float, default=1.0, help="frames per second (the board sends 1)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="simulated seconds per real second")
+    parser.add_argument("--ambient", type=float, default=22.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--stop-after", type=float, default=None, help="press the front-panel button after this many seconds")
+    args = parser.parse_args()
+
+    simulator = PeltierSimulator(sample_rate=args.rate, time_scale=args.time_scale, ambient=args.ambient, seed=args.seed)
+    simulator.start()
+    print(f"Simulated controller on {simulator.port_name} ({args.rate:g} frames/s). Ctrl+C to quit.")
+    sys.stdout.flush()
+    started = time.monotonic()
+    try:
+        while True:
+            time.sleep(0.5)
+            if args.stop_after is not None and time.monotonic() - started >= args.stop_after:
+                simulator.press_button()
+                args.stop_after = None
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Sent {simulator.frames_sent} frames, received {len(simulator.commands_received)} commands")
+        simulator.close()
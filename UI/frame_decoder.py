@@ -0,0 +1,83 @@
+import re
+
+# What the firmware sends (usb_helpers.c):
+#   send_temps_via_usb()          25 bytes: "x, y, z\n\r" + NUL padding
+#   send_stop_following_profile() 10 bytes: "STOP\n" + NUL padding
+# Every message ends in "\n". The "\r" and NULs after it end up at the start
+# of the next segment and are skipped as padding.
+FRAME_PATTERN = re.compile(rb"[\r\x00 ]*(?:(-?\d+\.\d+)[ \t]*,[ \t]*(-?\d+\.\d+)[ \t]*,[ \t]*(-?\d+\.\d+)|(STOP))[\r\x00 ]*")
+PADDING = b"\r\x00 \t"
+STOP = "STOP"
+MAX_PENDING = 4096  # No "\n" in this many bytes: the stream is garbage
+
+
+class FrameDecoder:
+    # Bulk decoder over a bytearray receive buffer. feed() appends what the
+    # port returned and decodes every complete message in place: segments
+    # are located with find() and matched with fullmatch(buffer, start, end),
+    # so no per-line bytes/str objects are built, and only the three number
+    # fields are copied out for float(). A partial message stays in the
+    # buffer for the next feed().
+    #
+    # feed() returns a list of (inside, outside, setpoint) float tuples, with
+    # STOP in place for the firmware's stop message. Segments that are
+    # neither (corruption, truncated frames, unknown output) are counted in
+    # `malformed` and kept in `last_malformed` for diagnostics.
+    def __init__(self):
+        self.buffer = bytearray()
+        self.frames = 0
+        self.stops = 0
+        self.malformed = 0
+        self.bytes_received = 0
+        self.last_malformed = None
+
+    def reset(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        self.bytes_received += len(data)
+        decoded = []
+        append = decoded.append
+        fullmatch = FRAME_PATTERN.fullmatch
+        start = 0
+        end = buffer.find(b"\n")
+        while end >= 0:
+            if end > start:
+                match = fullmatch(buffer, start, end)
+                if match is None:
+                    self.reject(buffer, start, end)
+                elif match.lastindex == 4:
+                    self.stops += 1
+                    append(STOP)
+                else:
+                    inside_temp, outside_temp, set_inside_temp = match.group(1, 2, 3)
+                    append((float(inside_temp), float(outside_temp), float(set_inside_temp)))
+            start = end + 1
+            end = buffer.find(b"\n", start)
+        if start:
+            del buffer[:start]
+        if len(buffer) > MAX_PENDING:
+            self.reject(buffer, 0, len(buffer))
+            del buffer[:]
+        self.frames += len(decoded)
+        return decoded
+
+    def reject(self, buffer, start, end):
+        # Padding-only segments (e.g. the NULs after STOP) are not errors
+        with memoryview(buffer) as view:
+            segment = bytes(view[start:end])
+        if not segment.strip(PADDING):
+            return
+        self.malformed += 1
+        self.last_malformed = segment[:64]
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "stops": self.stops,
+            "malformed": self.malformed,
+            "bytes": self.bytes_received,
+            "pending": len(self.buffer),
+        }
@@ -0,0 +1,229 @@
+import sys
+import time
+import signal
+import argparse
+import threading
+
+import serial
+
+from acquisition import AcquisitionEngine, Subscription
+from profile_executor import ProfileExecutor, timestamp_prefix
+from profile_program import parse_profile
+from profile_schedule import build_schedule
+from metrics import MetricsDumper, SamplingProfiler
+from settling import add_settling_arguments, detector_from_args
+
+# Exit status
+EXIT_OK = 0
+EXIT_ERROR = 1          # connect/send/record failure
+EXIT_USAGE = 2          # bad arguments or profile file (argparse uses 2 too)
+EXIT_DEVICE_STOP = 3    # front-panel button on the board aborted the profile
+EXIT_DISCONNECTED = 4
+EXIT_INTERRUPTED = 130  # Ctrl+C / SIGTERM while a profile was running
+
+MAX_SAMPLE_RATE = 1000  # frames/s the telemetry ring is sized for
+MAX_TELEMETRY_CAPACITY = 2 ** 21  # samples, 128 MB of ring (about 17 min at MAX_SAMPLE_RATE)
+
+
+class RunnerEvents(Subscription):
+    # What the runner acts on, without queueing every sample: terminal
+    # messages are echoed as they arrive, samples are only counted (or
+    # printed with --verbose), and the rest wakes the main thread.
+    def __init__(self, verbose=False, quiet=False):
+        super().__init__()
+        self.verbose = verbose
+        self.quiet = quiet
+        self.samples = 0
+        self.ready = threading.Event()
+
+    def push(self, event):
+        kind, timestamp, payload = event
+        if kind == "sample":
+            self.samples += 1
+            if self.verbose:
+                inside_temp, outside_temp, set_inside_temp = payload
+                write(f"{timestamp.strftime('[%H:%M:%S] ')}Inside {inside_temp} °C, Outside {outside_temp} °C, Set {set_inside_temp} °C\n")
+            return
+        if kind == "message":
+            if not self.quiet:
+                write(payload)
+            return
+        if kind == "event":
+            return
+        self.events.append(event)
+        self.ready.set()
+
+
+def write(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def telemetry_capacity(settling):
+    # The only history read here is the settling window, so the ring holds
+    # twice hold_time at MAX_SAMPLE_RATE rather than the GUI's hours of plot
+    samples = 2 * settling.hold_time * MAX_SAMPLE_RATE
+    if not samples <= MAX_TELEMETRY_CAPACITY:
+        raise ValueError(f"Settling hold time cannot be more than {MAX_TELEMETRY_CAPACITY / (2 * MAX_SAMPLE_RATE):g} s.")
+    return max(1024, int(samples))
+
+
+def load_profile(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        return parse_profile(f.read())
+
+
+def run(args):
+    profile = None
+    if args.profile:
+        try:
+            profile = load_profile(args.profile)
+        except (OSError, ValueError) as e:
+            print(f"Failed to load profile: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        if not profile:
+            print("Failed to load profile: no profile points.", file=sys.stderr)
+            return EXIT_USAGE
+
+    engine = AcquisitionEngine(baudrate=args.baudrate, telemetry_capacity=args.telemetry_capacity)
+    events = engine.add_subscription(RunnerEvents(verbose=args.verbose, quiet=args.quiet))
+    try:
+        engine.connect(args.port)
+    except (serial.SerialException, OSError, ValueError) as e:
+        print(f"Connection Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    interrupted = threading.Event()
+
+    def interrupt(signum, frame):
+        interrupted.set()
+        events.ready.set()
+
+    signal.signal(signal.SIGINT, interrupt)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, interrupt)
+
+    profiler = SamplingProfiler()
+
+    def toggle_profiler(signum, frame):
+        # `kill -USR1 <pid>` starts sampling; the next one saves the stacks
+        if profiler.toggle():
+            return
+        try:
+            profiler.save(args.profiler_output)
+        except OSError as e:
+            print(f"Failed to save profiler stacks: {e}", file=sys.stderr)
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, toggle_profiler)
+
+    executor = None
+    server = None
+    dumper = None
+    status = None
+    try:
+        if args.metrics_file:
+            dumper = MetricsDumper(engine.metrics, args.metrics_file, args.metrics_interval)
+            dumper.start()
+        if args.record:
+            try:
+                engine.start_recording(args.record)
+            except Exception as e:
+                print(f"Failed to open file for recording: {e}", file=sys.stderr)
+                status = EXIT_ERROR
+                return status
+            engine.log(f"{timestamp_prefix()}Recording to {args.record}\n")
+        if args.telemetry_port is not None or args.telemetry_socket:
+            from telemetry_server import TelemetryServer
+            try:
+                server = TelemetryServer(engine, args.telemetry_host, args.telemetry_port or 0, args.telemetry_socket)
+            except OSError as e:
+                print(f"Failed to start the telemetry server: {e}", file=sys.stderr)
+                status = EXIT_ERROR
+                return status
+            server.start()
+        if profile is not None:
+            executor = ProfileExecutor(engine, build_schedule(profile, args.tick_interval), start_delay=args.start_delay, settling=args.settling)
+            executor.start()
+        deadline = time.monotonic() + args.duration if args.duration else None
+
+        while status is None:
+            # Woken by events and signals; the timeout only bounds --duration
+            timeout = 1.0 if deadline is None else max(min(deadline - time.monotonic(), 1.0), 0.0)
+            events.ready.wait(timeout)
+            events.ready.clear()
+            for kind, timestamp, payload in events.drain():
+                if kind == "stop" and executor is not None and executor.running:
+                    engine.log(f"{timestamp_prefix()}Received STOP command, transmission stopped.\n")
+                    executor.stop()
+                    status = EXIT_DEVICE_STOP
+                elif kind == "disconnected":
+                    status = EXIT_DISCONNECTED
+                elif kind == "record_error":
+                    print(f"Failed to write to file: {payload}", file=sys.stderr)
+                    status = EXIT_ERROR
+                elif kind == "write_error":
+                    print(f"Send Error: {payload[0]}: {payload[1]}", file=sys.stderr)
+                    status = EXIT_ERROR
+                elif kind == "profile_finished" and status is None:
+                    if payload["error"] is not None:
+                        status = EXIT_ERROR
+                    elif payload["stopped"]:
+                        status = EXIT_INTERRUPTED
+                    else:
+                        status = EXIT_OK
+            if status is None and interrupted.is_set():
+                # Recording without a profile ends with Ctrl+C
+                status = EXIT_INTERRUPTED if executor is not None else EXIT_OK
+            if status is None and deadline is not None and time.monotonic() >= deadline:
+                status = EXIT_OK
+        return status
+    finally:
+        if executor is not None:
+            executor.stop()
+            if executor.thread is not None:
+                executor.thread.join(timeout=2)  # Lets it record PROFILE_END
+        if server is not None:
+            server.close()
+        engine.stop_recording()
+        engine.disconnect()
+        if dumper is not None:
+            dumper.stop()
+        if profiler.running:
+            toggle_profiler(None, None)
+        stats = engine.decoder.stats()
+        if not args.quiet:
+            write(f"{events.samples} samples, {stats['stops']} STOP, {stats['malformed']} malformed frames; exit status {status}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a temperature profile and/or record a Peltier controller without the GUI")
+    parser.add_argument("port", help="serial port, e.g. COM3 or /dev/ttyACM0")
+    parser.add_argument("profile", nargs="?", help="profile file (\"time,temp\" lines or a parametric profile); without one the run only records")
+    parser.add_argument("--record", metavar="FILE", help="record to FILE (.pltr for the binary format, anything else is text)")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds (default: when the profile ends, or Ctrl+C)")
+    parser.add_argument("--tick-interval", type=float, default=1.0, help="profile setpoint interval in seconds")
+    parser.add_argument("--start-delay", type=float, default=1.0, help="seconds between \"Profile\" and the first point")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--telemetry-port", type=int, help="stream samples and events as JSON lines on this TCP port")
+    parser.add_argument("--telemetry-host", default="127.0.0.1")
+    parser.add_argument("--telemetry-socket", help="stream on this Unix socket instead")
+    parser.add_argument("--metrics-file", help="periodically write metrics here (Prometheus text for *.prom, JSON otherwise)")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="seconds between metrics dumps")
+    parser.add_argument("--profiler-output", default="profile.collapsed", help="where SIGUSR1 toggling the sampling profiler saves stacks")
+    add_settling_arguments(parser)
+    parser.add_argument("--verbose", action="store_true", help="print every sample")
+    parser.add_argument("--quiet", action="store_true", help="print errors only")
+    args = parser.parse_args(argv)
+    if not args.profile and not args.record:
+        parser.error("nothing to do: give a profile and/or --record")
+    try:
+        args.settling = detector_from_args(args)
+        args.telemetry_capacity = telemetry_capacity(args.settling)
+    except ValueError as e:
+        parser.error(str(e))
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
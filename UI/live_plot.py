@@ -0,0 +1,163 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+from decimation import interleave_minmax
+
+
+class LivePlotWindow:
+    # Strip chart of the telemetry store. The axes (ticks, grid, labels) are
+    # rendered once into a cached background and only the three lines are
+    # blitted on top each frame, so a frame costs the same no matter how long
+    # the run has been going. The x axis is "seconds relative to now", which
+    # keeps the background valid while the data scrolls.
+    #
+    # Every frame pulls at most max_points min/max-decimated points per line
+    # for whatever x range is visible, so toolbar zoom/pan re-queries the
+    # store at the new resolution instead of plotting every sample.
+    def __init__(self, root, telemetry, window_seconds=600, fps=10, max_points=2000):
+        self.root = root
+        self.telemetry = telemetry
+        self.frame_interval_ms = int(1000 / fps)
+        self.max_points = max_points
+        self.following = True
+        self.reference_time = time.monotonic()
+        self.last_count = -1
+        self.dirty = True
+        self.background = None
+        self.autoscale_y = True
+        self.setting_limits = False
+        self.frame_job = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Live Temperature")
+        self.window.geometry("800x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.fig = Figure(figsize=(8, 4.5))
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_title("Live Temperature")
+        self.ax.set_xlabel("Time relative to now (s)")
+        self.ax.set_ylabel("Temperature (°C)")
+        self.ax.grid(True)
+        self.ax.set_xlim(-window_seconds, 0)
+        self.ax.set_ylim(0, 80)
+        self.lines = [
+            self.ax.plot([], [], linestyle='-', label='Inside', animated=True)[0],
+            self.ax.plot([], [], linestyle='-', label='Outside', animated=True)[0],
+            self.ax.plot([], [], linestyle='-', label='Set', animated=True)[0],
+        ]
+        self.ax.legend(loc="upper left")
+        self.fig.tight_layout()
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.window)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+        self.ax.callbacks.connect("xlim_changed", self.on_limits_changed)
+        self.ax.callbacks.connect("ylim_changed", self.on_limits_changed)
+
+        controls = tk.Frame(self.window)
+        controls.pack(fill="x")
+        toolbar = NavigationToolbar2Tk(self.canvas, controls, pack_toolbar=False)
+        toolbar.update()
+        toolbar.pack(side=tk.LEFT)
+        self.follow_button = ttk.Button(controls, text="Pause", command=self.toggle_follow, width=10)
+        self.follow_button.pack(side=tk.RIGHT, padx=5)
+        ttk.Button(controls, text="Autoscale", command=self.reset_autoscale, width=10).pack(side=tk.RIGHT, padx=5)
+
+        self.canvas.draw()
+        self.frame_job = self.root.after(self.frame_interval_ms, self.update_frame)
+
+    def exists(self):
+        return self.window is not None and self.window.winfo_exists()
+
+    def lift(self):
+        self.window.focus_set()
+        self.window.lift()
+
+    def close(self):
+        if self.frame_job is not None:
+            self.root.after_cancel(self.frame_job)
+            self.frame_job = None
+        if self.window is not None:
+            self.window.destroy()
+        self.window = None
+
+    def toggle_follow(self):
+        self.following = not self.following
+        self.follow_button.config(text="Pause" if self.following else "Follow")
+        self.dirty = True
+
+    def reset_autoscale(self):
+        self.autoscale_y = True
+        self.dirty = True
+
+    def on_limits_changed(self, ax):
+        if not self.setting_limits:
+            # Toolbar zoom/pan: keep the user's y range and re-decimate
+            self.autoscale_y = False
+        self.dirty = True
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+
+    def update_frame(self):
+        try:
+            if self.following:
+                self.reference_time = time.monotonic()
+            count = self.telemetry.count
+            if count != self.last_count or self.dirty:
+                self.last_count = count
+                self.dirty = False
+                self.refresh_lines()
+        finally:
+            self.frame_job = self.root.after(self.frame_interval_ms, self.update_frame)
+
+    def refresh_lines(self):
+        x0, x1 = self.ax.get_xlim()
+        t0 = self.reference_time + x0
+        t1 = self.reference_time + x1
+        bin_times, mins, maxs = self.telemetry.decimated(t0, t1, self.max_points // 2)
+        times, values = interleave_minmax(bin_times, mins, maxs)
+        relative_times = times - self.reference_time
+        for line, channel in zip(self.lines, values):
+            line.set_data(relative_times, channel)
+
+        if self.autoscale_y and len(times) and self.rescale_y(values):
+            # Limits changed: full redraw, on_draw re-captures the background
+            self.canvas.draw_idle()
+            return
+        self.blit()
+
+    def rescale_y(self, values):
+        finite = values[np.isfinite(values)]
+        if len(finite) == 0:
+            return False
+        low, high = finite.min(), finite.max()
+        y0, y1 = self.ax.get_ylim()
+        span = max(high - low, 1.0)
+        # Only rescale when data leaves the view or the view has become much
+        # taller than needed, so the background isn't re-rendered every frame
+        if low >= y0 and high <= y1 and (y1 - y0) <= span * 3:
+            return False
+        self.setting_limits = True
+        try:
+            self.ax.set_ylim(low - span * 0.1, high + span * 0.1)
+        finally:
+            self.setting_limits = False
+        return True
+
+    def blit(self):
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+        self.canvas.blit(self.ax.bbox)
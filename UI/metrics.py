@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import threading
+from bisect import bisect_left
+from collections import Counter as StackCounter
+
+# Latency buckets (seconds): 50 us .. 10 s, roughly x2.5 apart
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    # Monotonic count. inc() is a plain attribute add: the GIL makes it
+    # safe enough for statistics from a single writer thread.
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def get(self):
+        return self.value
+
+
+class CallbackMetric:
+    # A counter or gauge read from existing state when a snapshot is taken
+    # (decoder counters, queue lengths), so the hot path pays nothing
+    def __init__(self, name, help_text, function, kind):
+        self.name = name
+        self.help_text = help_text
+        self.function = function
+        self.kind = kind
+
+    def get(self):
+        try:
+            return self.function()
+        except Exception:
+            return None
+
+
+class Histogram:
+    # Fixed buckets (upper bounds, seconds): observe() is a bisect and two
+    # adds. Quantiles are estimated from the buckets.
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def get(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    # Named counters, gauges and histograms, exported as JSON or Prometheus
+    # text. Metrics are created once (by whoever owns the measured code) and
+    # updated through the returned object; snapshot() reads them all.
+    def __init__(self):
+        self.metrics = {}
+        self.started = time.time()
+
+    def add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text=""):
+        existing = self.metrics.get(name)
+        return existing if existing is not None else self.add(Counter(name, help_text))
+
+    def histogram(self, name, help_text="", buckets=LATENCY_BUCKETS):
+        existing = self.metrics.get(name)
+        return existing if existing is not None else self.add(Histogram(name, help_text, buckets))
+
+    def counter_function(self, name, help_text, function):
+        return self.add(CallbackMetric(name, help_text, function, "counter"))
+
+    def gauge(self, name, help_text, function):
+        return self.add(CallbackMetric(name, help_text, function, "gauge"))
+
+    def snapshot(self):
+        return {"time": time.time(), "uptime": time.time() - self.started,
+                "metrics": {name: metric.get() for name, metric in list(self.metrics.items())}}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=1, sort_keys=True)
+
+    def to_prometheus(self):
+        lines = []
+        for name, metric in sorted(list(self.metrics.items())):
+            if metric.help_text:
+                lines.append(f"# HELP {name} {metric.help_text}")
+            if isinstance(metric, Histogram):
+                lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, count in zip(metric.bounds, metric.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{le="+Inf"}} {metric.count}')
+                lines.append(f"{name}_sum {metric.total:.9g}")
+                lines.append(f"{name}_count {metric.count}")
+                continue
+            value = metric.get()
+            if value is None:
+                continue
+            kind = metric.kind if isinstance(metric, CallbackMetric) else "counter"
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class RateTracker:
+    # Per-second rates of counters between two snapshots, for the debug panel
+    def __init__(self):
+        self.previous = None
+
+    def update(self, snapshot):
+        rates = {}
+        if self.previous is not None:
+            elapsed = snapshot["time"] - self.previous["time"]
+            for name, value in snapshot["metrics"].items():
+                old = self.previous["metrics"].get(name)
+                if isinstance(value, dict) and isinstance(old, dict):
+                    value, old = value["count"], old["count"]  # Histograms: observations per second
+                if elapsed > 0 and isinstance(value, (int, float)) and isinstance(old, (int, float)):
+                    rates[name] = (value - old) / elapsed
+        self.previous = snapshot
+        return rates
+
+
+class MetricsDumper:
+    # Rewrites a metrics file every `interval` seconds from a background
+    # thread: Prometheus text for *.prom (e.g. for node_exporter's textfile
+    # collector), JSON otherwise. Written to a temporary file and renamed so
+    # readers never see a partial dump.
+    def __init__(self, registry, file_path, interval=10.0):
+        self.registry = registry
+        self.file_path = file_path
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        self.thread = None
+        self.dump()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        text = self.registry.to_prometheus() if self.file_path.endswith(".prom") else self.registry.to_json()
+        temporary_path = self.file_path + ".tmp"
+        try:
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temporary_path, self.file_path)
+        except OSError:
+            pass  # Best effort: metrics must never take the app down
+
+
+class SamplingProfiler:
+    # Statistical profiler for every thread: while running, a background
+    # thread grabs all stacks (sys._current_frames()) every `interval`
+    # seconds and counts them. Nothing is installed when it isn't running,
+    # so it costs nothing until started, and it can be started and stopped
+    # at any time. collapsed() gives "thread;outer;...;inner count" lines,
+    # the input format of flamegraph.pl and speedscope.
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = StackCounter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stacks = StackCounter()
+        self.samples = 0
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="SamplingProfiler")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        self.thread = None
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+        return self.running
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit=20):
+        # Innermost frames by share of samples: where the time is spent
+        leaves = StackCounter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(function, count / total) for function, count in leaves.most_common(limit)]
+
+    def save(self, file_path):
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
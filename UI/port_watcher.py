@@ -0,0 +1,133 @@
+import os
+import sys
+import datetime
+import threading
+
+import serial.tools.list_ports
+
+from acquisition import Subscription
+
+DEV_DIRECTORIES = ("/dev", "/dev/serial/by-id")
+WINDOWS_SERIALCOMM_KEY = r"HARDWARE\DEVICEMAP\SERIALCOMM"
+
+
+def list_port_names():
+    return [port.device for port in serial.tools.list_ports.comports()]
+
+
+def dev_signature():
+    # Adding or removing a device node changes the directory's mtime
+    signature = []
+    for directory in DEV_DIRECTORIES:
+        try:
+            signature.append(os.stat(directory).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    if signature[0] is None:
+        return None
+    return tuple(signature)
+
+
+def windows_signature():
+    # The serial port map Windows keeps in the registry: one value per port
+    import winreg
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, WINDOWS_SERIALCOMM_KEY) as key:
+            values = []
+            index = 0
+            while True:
+                try:
+                    values.append(winreg.EnumValue(key, index)[:2])
+                except OSError:
+                    break
+                index += 1
+            return tuple(sorted(values))
+    except OSError:
+        return ()  # No serial ports at all: the key doesn't exist
+
+
+def default_signature():
+    if sys.platform.startswith("win"):
+        return windows_signature
+    if os.path.isdir("/dev"):
+        return dev_signature
+    return None
+
+
+class PortWatcher:
+    # Watches for serial ports appearing and disappearing on a background
+    # thread. Every check_interval it takes a cheap signature (/dev mtimes,
+    # or the SERIALCOMM registry key on Windows) and only runs the full
+    # comports() enumeration when that changed, plus once every
+    # rescan_interval as a safety net. Where no signature is available it
+    # falls back to enumerating every poll_interval.
+    #
+    # Subscribers receive ("ports", timestamp, [port names]) only when the
+    # list actually changed (and once at start).
+    def __init__(self, check_interval=0.5, rescan_interval=30.0, poll_interval=3.0, signature=None, list_ports=list_port_names):
+        self.check_interval = check_interval
+        self.rescan_interval = rescan_interval
+        self.poll_interval = poll_interval
+        self.signature = signature if signature is not None else default_signature()
+        self.list_ports = list_ports
+        self.ports = None
+        self.scans = 0
+        self.subscriptions = []
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def subscribe(self, maxlen=16):
+        subscription = Subscription(maxlen)
+        self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        self.thread = None
+
+    def take_signature(self):
+        if self.signature is None:
+            return None
+        try:
+            return self.signature()
+        except Exception:
+            return None
+
+    def scan(self):
+        self.scans += 1
+        try:
+            ports = self.list_ports()
+        except Exception:
+            return
+        if ports != self.ports:
+            self.ports = ports
+            event = ("ports", datetime.datetime.now(), list(ports))
+            for subscription in self.subscriptions:
+                subscription.push(event)
+
+    def run(self):
+        signature = self.take_signature()
+        self.scan()
+        since_scan = 0.0
+        while not self.stop_event.wait(self.check_interval):
+            since_scan += self.check_interval
+            if signature is None:
+                # No cheap change detection here: plain (slower) polling
+                if since_scan >= self.poll_interval:
+                    signature = self.take_signature()
+                    self.scan()
+                    since_scan = 0.0
+                continue
+            current = self.take_signature()
+            if current != signature or since_scan >= self.rescan_interval:
+                signature = current
+                self.scan()
+                since_scan = 0.0
@@ -0,0 +1,227 @@
+import threading
+import datetime
+import time
+import math
+
+from recording import EVENT_PROFILE_START, EVENT_PROFILE_END
+from settling import SettlingDetector
+
+
+def interpolate_temperature(profile_points, current_time):
+    if not profile_points:
+        return 20
+
+    if current_time <= profile_points[0][0]:
+        return profile_points[0][1]
+    if current_time >= profile_points[-1][0]:
+        return profile_points[-1][1]
+
+    for i in range(len(profile_points) - 1):
+        t1, temp1 = profile_points[i]
+        t2, temp2 = profile_points[i + 1]
+        if t1 <= current_time <= t2:
+            fraction = (current_time - t1) / (t2 - t1)
+            interpolated_temp = temp1 + (temp2 - temp1) * fraction
+            return round(interpolated_temp, 1)
+    return profile_points[-1][1]
+
+
+def timestamp_prefix():
+    return datetime.datetime.now().strftime('[%H:%M:%S] ')
+
+
+class ProfileExecutor:
+    # Runs a temperature profile against absolute time.monotonic() deadlines:
+    # tick k is due at start + k * tick_interval, so Tk latency and the cost
+    # of each step never accumulate into drift. When a wakeup is late by more
+    # than a tick, the missed ticks are skipped and only the current setpoint
+    # is sent (catch-up, no burst of stale commands).
+    #
+    # Progress goes to the terminal through engine.log(); completion is
+    # published as a ("profile_finished", timestamp, result) engine event
+    # carrying the timing statistics of the run.
+    #
+    # The setpoints come from a CompiledProfile (or a ProgramSchedule, which
+    # expands a parametric profile lazily), so each tick is a cursor step
+    # rather than an interpolation scan over the profile points.
+    #
+    # The profile is a small state machine: begin() returns the first
+    # deadline and step(lateness) is called at each deadline and returns the
+    # next one (None when done). start() drives it from a dedicated thread;
+    # start(scheduler) hands it to a shared DeviceScheduler instead so many
+    # devices can run profiles without a thread each.
+    #
+    # The timeline starts once the first point has settled (SettlingDetector
+    # on the engine's telemetry), and a "settle" hold of a parametric
+    # profile ends as soon as it has: the timeline is shifted past the rest
+    # of the hold so later segments keep their spacing.
+    def __init__(self, engine, schedule, start_delay=1.0, settling=None):
+        self.engine = engine
+        self.schedule = schedule
+        self.settling = settling if settling is not None else SettlingDetector()
+        self.tick_interval = schedule.tick_interval
+        self.start_delay = start_delay
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.scheduler = None
+        self.active = False
+        self.phase = None
+        self.last_setpoint = None
+        self.first_point_deadline = None
+        self.timeline_start = None
+        self.tick = 0
+        self.ticks = 0
+        self.lateness_sum = 0.0
+        self.lateness_sum_sq = 0.0
+        self.lateness_max = 0.0
+        self.skipped_ticks = 0
+        self.settled_time = 0.0  # Seconds of "settle" holds skipped
+        self.tick_lateness = engine.metrics.histogram("profile_tick_lateness_seconds", "Profile tick wakeup lateness")
+
+    @property
+    def running(self):
+        return self.active
+
+    def start(self, scheduler=None):
+        self.stop_event.clear()
+        self.active = True
+        if scheduler is not None:
+            self.scheduler = scheduler
+            scheduler.add_executor(self)
+            return
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.scheduler is not None:
+            self.scheduler.wake()
+
+    def send_setpoint(self, temp):
+        # Queued for the engine's writer, which records it when written
+        self.engine.send_setpoint(temp)
+        self.last_setpoint = temp
+
+    def wait_until(self, deadline):
+        # Returns the wakeup lateness in seconds, or None if stopped
+        remaining = deadline - time.monotonic()
+        if remaining > 0 and self.stop_event.wait(remaining):
+            return None
+        if self.stop_event.is_set():
+            return None
+        return time.monotonic() - deadline
+
+    def run(self):
+        try:
+            deadline = self.begin()
+            while deadline is not None:
+                lateness = self.wait_until(deadline)
+                if lateness is None:
+                    self.finish(stopped=True)
+                    return
+                deadline = self.step(lateness)
+        except Exception as e:
+            self.finish(error=e)
+
+    def begin(self):
+        self.phase = "starting"
+        self.engine.log(f"{timestamp_prefix()}Starting profile transmission...\n")
+        self.engine.record_event(EVENT_PROFILE_START)
+        self.engine.send("Profile\n")
+        self.engine.log(f"{timestamp_prefix()}Sent: Profile\n")
+        return time.monotonic() + self.start_delay
+
+    def step(self, lateness):
+        if self.phase == "starting":
+            target_temp = self.schedule.first_setpoint
+            self.engine.log(f"{timestamp_prefix()}Sending first point: {target_temp:.1f}\n (Waiting for {target_temp}°C, {self.settling.describe()})\n")
+            self.phase = "first_point"
+            self.first_point_deadline = time.monotonic()
+        if self.phase == "first_point":
+            return self.step_first_point()
+        return self.step_timeline(lateness)
+
+    def step_first_point(self):
+        target_temp = self.schedule.first_setpoint
+        self.send_setpoint(target_temp)
+        if self.settling.settled(self.engine.telemetry, target_temp):
+            self.engine.log(f"{timestamp_prefix()}Reached the first point's temperature: {target_temp}°C\n")
+            self.engine.log(f"{timestamp_prefix()}Continuing profile transmission\n")
+            self.phase = "timeline"
+            self.timeline_start = time.monotonic()
+            self.schedule.reset()
+            self.tick = 0
+            return self.send_tick()
+        self.first_point_deadline += self.tick_interval
+        return self.first_point_deadline
+
+    def step_timeline(self, lateness):
+        self.ticks += 1
+        self.lateness_sum += lateness
+        self.lateness_sum_sq += lateness * lateness
+        self.lateness_max = max(self.lateness_max, lateness)
+        self.tick_lateness.observe(lateness)
+        # Catch up: jump to the tick that is due now instead of replaying
+        # every missed one
+        due_tick = int((time.monotonic() - self.timeline_start) / self.tick_interval)
+        if due_tick > self.tick + 1:
+            self.skipped_ticks += due_tick - self.tick - 1
+        self.tick = max(self.tick + 1, due_tick)
+        if self.tick > self.schedule.last_tick:
+            self.finish(stopped=False)
+            return None
+        return self.send_tick()
+
+    def send_tick(self):
+        temp = self.schedule.advance(self.tick)
+        if temp != self.last_setpoint:
+            self.engine.log(f"{timestamp_prefix()}Sent: {temp:.1f}\n")
+            self.send_setpoint(temp)
+        end_tick = self.schedule.settle_end_tick(self.tick)
+        if end_tick is not None and self.settling.settled(self.engine.telemetry, temp):
+            skipped = (end_tick - self.tick) * self.tick_interval
+            self.engine.log(f"{timestamp_prefix()}Settled at {temp:.1f}°C, skipping the remaining {skipped:.0f} s of the hold\n")
+            self.settled_time += skipped
+            self.timeline_start -= skipped
+            self.tick = end_tick
+            return self.send_tick()
+        return self.timeline_start + (self.tick + 1) * self.tick_interval
+
+    def finish(self, stopped=False, error=None):
+        if not self.active:
+            return
+        self.active = False
+        stats = None
+        if self.phase == "timeline":
+            stats = self.timing_stats(self.timeline_start, min(self.tick, self.schedule.last_tick))
+        if error is not None:
+            error = str(error)
+            self.engine.log(f"{timestamp_prefix()}Send Error: {error}\n")
+        elif stopped:
+            self.engine.log(f"{timestamp_prefix()}Profile transmission stopped.\n")
+        else:
+            self.engine.log(f"{timestamp_prefix()}Profile transmission completed.\n")
+        if stats is not None:
+            self.engine.log(f"{timestamp_prefix()}Profile timing: {stats['ticks']} ticks, jitter mean {stats['jitter_mean'] * 1000:.1f} ms / max {stats['jitter_max'] * 1000:.1f} ms, {stats['skipped_ticks']} ticks skipped, drift {stats['drift'] * 1000:.1f} ms\n")
+            if self.settled_time:
+                self.engine.log(f"{timestamp_prefix()}Settle holds ended {self.settled_time:.0f} s early\n")
+        self.phase = None
+        self.engine.record_event(EVENT_PROFILE_END)
+        self.engine.publish(("profile_finished", datetime.datetime.now(), {"executor": self, "stopped": stopped, "error": error, "stats": stats}))
+
+    def timing_stats(self, start, tick):
+        count = self.ticks
+        mean = self.lateness_sum / count if count else 0.0
+        variance = self.lateness_sum_sq / count - mean * mean if count else 0.0
+        return {
+            "ticks": count,
+            "tick_interval": self.tick_interval,
+            "jitter_mean": mean,
+            "jitter_max": self.lateness_max,
+            "jitter_std": math.sqrt(max(variance, 0.0)),
+            "skipped_ticks": self.skipped_ticks,
+            "settled_time": self.settled_time,
+            # Wall time actually spent versus the time the profile defines
+            "drift": (time.monotonic() - start) - (tick + 1) * self.tick_interval,
+        }
@@ -0,0 +1,152 @@
+import math
+from bisect import bisect_left, insort
+
+MIN_TEMPERATURE = 5
+MAX_TEMPERATURE = 70
+
+
+def validate_point(time, temperature):
+    if not math.isfinite(time):
+        raise ValueError("Time must be a finite number.")
+    if time < 0:
+        raise ValueError("Time cannot be negative.")
+    if not (MIN_TEMPERATURE <= temperature <= MAX_TEMPERATURE):
+        raise ValueError(f"Temperature must be between {MIN_TEMPERATURE} and {MAX_TEMPERATURE} °C.")
+
+
+def parse_points(text):
+    # "time,temp" per line, as written by Save Profile. Tabs or spaces also
+    # separate the two columns so ranges copied from a spreadsheet paste
+    # directly. Blank lines are skipped.
+    points = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        fields = line.replace(",", " ").split()
+        try:
+            if len(fields) != 2:
+                raise ValueError
+            points.append((float(fields[0]), float(fields[1])))
+        except ValueError:
+            raise ValueError(f"Line {line_number}: expected \"time,temperature\", got \"{line}\".")
+    return points
+
+
+def format_point(time, temperature):
+    return f"Time: {time:.1f}s, Temp: {temperature:.1f}°C"
+
+
+class ProfileModel:
+    # Profile points kept sorted by time in two parallel lists, so the
+    # duplicate-time check and finding where a point goes are binary
+    # searches (O(log n)); the list insert or delete itself still shifts
+    # the later entries (O(n) memmove, cheap at editor sizes). The editor
+    # updates only the listbox row that changed. A third sorted list of
+    # the temperatures gives the plot's y range without scanning every
+    # point.
+    #
+    # Behaves like the sorted list of (time, temperature) tuples it
+    # replaces: len(), iteration and indexing all work.
+    def __init__(self, points=()):
+        self.times = []
+        self.temps = []
+        self.sorted_temps = []
+        if points:
+            self.insert_many(points)
+
+    def __len__(self):
+        return len(self.times)
+
+    def __bool__(self):
+        return bool(self.times)
+
+    def __iter__(self):
+        return zip(self.times, self.temps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(zip(self.times[index], self.temps[index]))
+        return self.times[index], self.temps[index]
+
+    def index_of(self, time):
+        index = bisect_left(self.times, time)
+        if index < len(self.times) and self.times[index] == time:
+            return index
+        return None
+
+    def __contains__(self, time):
+        return self.index_of(time) is not None
+
+    def insert(self, time, temperature):
+        # Returns the row the point landed on
+        validate_point(time, temperature)
+        index = bisect_left(self.times, time)
+        if index < len(self.times) and self.times[index] == time:
+            raise ValueError("A point with this time already exists.")
+        self.times.insert(index, time)
+        self.temps.insert(index, temperature)
+        insort(self.sorted_temps, temperature)
+        return index
+
+    def delete(self, index):
+        time = self.times.pop(index)
+        temperature = self.temps.pop(index)
+        del self.sorted_temps[bisect_left(self.sorted_temps, temperature)]
+        return time, temperature
+
+    def insert_many(self, points):
+        # All or nothing: every point is validated and checked for duplicate
+        # times (among themselves and against the profile) before anything
+        # changes. The batch is sorted once and merged in a single pass.
+        # Returns the rows the new points landed on, ascending.
+        new_points = sorted((float(time), float(temperature)) for time, temperature in points)
+        for position, (time, temperature) in enumerate(new_points):
+            try:
+                validate_point(time, temperature)
+            except ValueError as e:
+                raise ValueError(f"Point ({time:g}, {temperature:g}): {e}")
+            if (position and new_points[position - 1][0] == time) or time in self:
+                raise ValueError(f"Point ({time:g}, {temperature:g}): A point with this time already exists.")
+        times = []
+        temps = []
+        rows = []
+        old = 0
+        old_times = self.times
+        for time, temperature in new_points:
+            while old < len(old_times) and old_times[old] < time:
+                times.append(old_times[old])
+                temps.append(self.temps[old])
+                old += 1
+            rows.append(len(times))
+            times.append(time)
+            temps.append(temperature)
+        times.extend(old_times[old:])
+        temps.extend(self.temps[old:])
+        self.times = times
+        self.temps = temps
+        self.sorted_temps = sorted(self.sorted_temps + [temperature for _, temperature in new_points])
+        return rows
+
+    def replace(self, points):
+        # Validates the new points before dropping the current ones
+        model = ProfileModel(points)
+        self.times, self.temps, self.sorted_temps = model.times, model.temps, model.sorted_temps
+
+    def clear(self):
+        self.times = []
+        self.temps = []
+        self.sorted_temps = []
+
+    def time_range(self):
+        if not self.times:
+            return None
+        return self.times[0], self.times[-1]
+
+    def temperature_range(self):
+        if not self.sorted_temps:
+            return None
+        return self.sorted_temps[0], self.sorted_temps[-1]
+
+    def labels(self, first=0, last=None):
+        return [format_point(time, temperature) for time, temperature in zip(self.times[first:last], self.temps[first:last])]
@@ -0,0 +1,167 @@
+import math
+
+from profile_model import ProfileModel, validate_point, parse_points
+
+# Parametric profiles: a few lines describe what would otherwise be one
+# "time,temp" line per breakpoint, e.g. a 1000-cycle thermal test:
+#
+#   # Comments start with "#"
+#   start 25            temperature at t = 0 (required, first)
+#   ramp 60 2m          linear ramp to 60 °C over 2 minutes
+#   hold 30             keep the temperature for 30 s
+#   settle 10m          keep it until the plant has settled (see
+#                       SettlingDetector), for at most 10 minutes
+#   step 20             jump to 20 °C
+#   repeat 1000         repeat the block up to "end" (blocks nest)
+#       ramp 60 60
+#       hold 5m
+#       ramp 20 60
+#       hold 5m
+#   end
+#
+# Durations are seconds, or take an s/m/h suffix.
+KEYWORDS = ("start", "ramp", "hold", "settle", "step", "repeat", "end")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def is_program_text(text):
+    # Point files start with a number, programs with a keyword
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            return line.split()[0].lower() in KEYWORDS
+    return False
+
+
+def parse_profile(text):
+    # Either format, validated: a ProfileProgram, or the sorted list of
+    # (time, temp) points of a "time,temp" file
+    if is_program_text(text):
+        return parse_program(text)
+    return list(ProfileModel(parse_points(text)))
+
+
+def parse_duration(text):
+    unit = DURATION_UNITS.get(text[-1:].lower())
+    seconds = float(text[:-1]) * unit if unit else float(text)
+    if not math.isfinite(seconds):
+        raise ValueError(f"Invalid duration \"{text}\".")
+    if seconds < 0:
+        raise ValueError("Durations cannot be negative.")
+    return seconds
+
+
+def parse_program(text):
+    # Parses and validates the compact form. Every temperature the profile
+    # can reach is a start, ramp or step target (segments are linear), so
+    # checking those checks the whole expanded profile, however many
+    # repetitions it has.
+    start_temp = None
+    blocks = [[]]
+    for line_number, raw_line in enumerate(text.splitlines(), start=1):
+        line = raw_line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        keyword, *args = line.split()
+        keyword = keyword.lower()
+        expected = {"start": 1, "ramp": 2, "hold": 1, "settle": 1, "step": 1, "repeat": 1, "end": 0}.get(keyword)
+        try:
+            if expected is None:
+                raise ValueError(f"Unknown segment \"{keyword}\".")
+            if len(args) != expected:
+                raise ValueError(f"\"{keyword}\" takes {expected} value(s).")
+            if (keyword == "start") != (start_temp is None):
+                raise ValueError("The profile must begin with exactly one \"start\" line.")
+            if keyword == "start":
+                start_temp = float(args[0])
+                validate_point(0, start_temp)
+            elif keyword == "ramp":
+                target, duration = float(args[0]), parse_duration(args[1])
+                validate_point(duration, target)
+                blocks[-1].append(("ramp", target, duration))
+            elif keyword in ("hold", "settle"):
+                blocks[-1].append((keyword, parse_duration(args[0])))
+            elif keyword == "step":
+                target = float(args[0])
+                validate_point(0, target)
+                blocks[-1].append(("step", target))
+            elif keyword == "repeat":
+                count = int(args[0])
+                if count < 1:
+                    raise ValueError("Repeat count must be at least 1.")
+                blocks[-1].append(("repeat", count, None))
+                blocks.append([])
+            else:
+                if len(blocks) == 1:
+                    raise ValueError("\"end\" without \"repeat\".")
+                body = tuple(blocks.pop())
+                if not body:
+                    raise ValueError("Empty repeat block.")
+                _, count, _ = blocks[-1][-1]
+                blocks[-1][-1] = ("repeat", count, body)
+        except ValueError as e:
+            raise ValueError(f"Line {line_number}: {e}")
+    if start_temp is None:
+        raise ValueError("The profile has no \"start\" line.")
+    if len(blocks) > 1:
+        raise ValueError("\"repeat\" without \"end\".")
+    if not math.isfinite(block_duration(blocks[0])):
+        raise ValueError("The profile is too long.")
+    return ProfileProgram(start_temp, tuple(blocks[0]), text)
+
+
+def block_duration(block):
+    total = 0.0
+    for segment in block:
+        if segment[0] in ("ramp", "hold", "settle"):
+            total += segment[-1]
+        elif segment[0] == "repeat":
+            total += segment[1] * block_duration(segment[2])
+    return total
+
+
+class ProfileProgram:
+    # A parsed parametric profile. It is never expanded in memory:
+    # segments() and breakpoints() are generators that walk the repeat
+    # blocks on the fly, so a 1000-cycle test costs the same as one cycle
+    # until it is consumed.
+    def __init__(self, start_temp, block, source):
+        self.start_temp = start_temp
+        self.block = block
+        self.source = source
+        self.total_time = block_duration(block)
+
+    def source_lines(self):
+        return [line.rstrip() for line in self.source.splitlines() if line.strip()]
+
+    def segments(self):
+        # (start_time, end_time, start_temp, end_temp, settle) linear pieces
+        # in time order. Steps are zero-length pieces; settle marks a hold
+        # the executor may cut short once the temperature has settled (its
+        # times are the full, longest, duration).
+        state = [0.0, self.start_temp]
+        yield from self.walk(self.block, state)
+
+    def walk(self, block, state):
+        for segment in block:
+            kind = segment[0]
+            time, temp = state
+            if kind == "ramp":
+                _, target, duration = segment
+                state[:] = [time + duration, target]
+                yield time, time + duration, temp, target, False
+            elif kind in ("hold", "settle"):
+                state[0] = time + segment[1]
+                yield time, time + segment[1], temp, temp, kind == "settle"
+            elif kind == "step":
+                state[1] = segment[1]
+                yield time, time, temp, segment[1], False
+            else:
+                for _ in range(segment[1]):
+                    yield from self.walk(segment[2], state)
+
+    def breakpoints(self):
+        # (time, temp) corners of the expanded profile, for plotting
+        yield 0.0, self.start_temp
+        for _, end_time, _, end_temp, _ in self.segments():
+            yield end_time, end_temp
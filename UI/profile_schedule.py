@@ -0,0 +1,125 @@
+import math
+import numpy as np
+
+from profile_program import ProfileProgram
+
+SETPOINT_RESOLUTION = 0.1  # °C, what the firmware receives ("%.1f")
+COMPILE_BLOCK_TICKS = 65536
+
+
+class CompiledProfile:
+    # A profile compiled once into the setpoints it will actually send:
+    # linear interpolation sampled at every executor tick, quantized to
+    # 0.1 °C, keeping only the ticks where the quantized value changes.
+    # The executor walks it with a forward cursor (amortized O(1) per tick)
+    # and only transmits on a change.
+    def __init__(self, profile_points, tick_interval=1.0, resolution=SETPOINT_RESOLUTION):
+        if not profile_points:
+            raise ValueError("Profile has no points.")
+        self.tick_interval = tick_interval
+        self.resolution = resolution
+        times = np.array([point[0] for point in profile_points], dtype=np.float64)
+        temps = np.array([point[1] for point in profile_points], dtype=np.float64)
+        order = np.argsort(times, kind="stable")
+        self.point_times = times[order]
+        self.point_temps = temps[order]
+        self.total_time = float(self.point_times[-1])
+        self.last_tick = math.floor(self.total_time / tick_interval + 1e-9)
+        self.change_ticks, self.change_values = self.compile()
+        self.cursor = 0
+
+    def quantize(self, values):
+        return np.round(np.round(values / self.resolution) * self.resolution, 6)
+
+    def compile(self):
+        # Done in blocks so long profiles at fine tick rates never need an
+        # array with one entry per tick
+        change_ticks = []
+        change_values = []
+        previous = None
+        for first in range(0, self.last_tick + 1, COMPILE_BLOCK_TICKS):
+            ticks = np.arange(first, min(first + COMPILE_BLOCK_TICKS, self.last_tick + 1))
+            values = self.quantize(np.interp(ticks * self.tick_interval, self.point_times, self.point_temps))
+            changed = np.empty(len(values), dtype=bool)
+            changed[0] = previous is None or values[0] != previous
+            changed[1:] = values[1:] != values[:-1]
+            change_ticks.append(ticks[changed])
+            change_values.append(values[changed])
+            previous = values[-1]
+        return np.concatenate(change_ticks), np.concatenate(change_values)
+
+    def __len__(self):
+        return len(self.change_ticks)
+
+    @property
+    def first_setpoint(self):
+        return float(self.change_values[0])
+
+    def reset(self):
+        self.cursor = 0
+
+    def advance(self, tick):
+        # Setpoint for a tick at or after the previous call
+        change_ticks = self.change_ticks
+        cursor = self.cursor
+        while cursor + 1 < len(change_ticks) and change_ticks[cursor + 1] <= tick:
+            cursor += 1
+        self.cursor = cursor
+        return float(self.change_values[cursor])
+
+    def settle_end_tick(self, tick):
+        # Point profiles have no "settle" holds
+        return None
+
+
+class ProgramSchedule:
+    # Executor schedule for a ProfileProgram, with the same interface as
+    # CompiledProfile but expanded lazily: advance() pulls segments from
+    # the program's generator as time passes and keeps only the current and
+    # next one, so memory is constant however many cycles the program has.
+    # Ticks must move forward (the executor calls reset() to restart).
+    def __init__(self, program, tick_interval=1.0, resolution=SETPOINT_RESOLUTION):
+        self.program = program
+        self.tick_interval = tick_interval
+        self.resolution = resolution
+        self.total_time = program.total_time
+        self.last_tick = math.floor(self.total_time / tick_interval + 1e-9)
+        self.reset()
+        self.first_setpoint = self.advance(0)
+        self.reset()
+
+    def quantize(self, value):
+        return round(round(value / self.resolution) * self.resolution, 6)
+
+    def reset(self):
+        self.segments = self.program.segments()
+        self.current = (0.0, 0.0, self.program.start_temp, self.program.start_temp, False)
+        self.next = next(self.segments, None)
+
+    def advance(self, tick):
+        time = tick * self.tick_interval
+        # The last segment starting at or before `time` applies, so a step
+        # at t takes effect from t on
+        while self.next is not None and self.next[0] <= time:
+            self.current = self.next
+            self.next = next(self.segments, None)
+        start_time, end_time, start_temp, end_temp, _ = self.current
+        if time >= end_time:
+            return self.quantize(end_temp)
+        return self.quantize(start_temp + (end_temp - start_temp) * (time - start_time) / (end_time - start_time))
+
+    def settle_end_tick(self, tick):
+        # Last tick of the "settle" hold that advance(tick) landed in, or
+        # None: the executor skips there once the temperature has settled
+        _, end_time, _, _, settle = self.current
+        if not settle:
+            return None
+        end_tick = math.floor(end_time / self.tick_interval + 1e-9)
+        return end_tick if end_tick > tick else None
+
+
+def build_schedule(profile, tick_interval=1.0):
+    # A ProfileProgram runs lazily; a list of (time, temp) points is compiled
+    if isinstance(profile, ProfileProgram):
+        return ProgramSchedule(profile, tick_interval)
+    return CompiledProfile(sorted(profile), tick_interval=tick_interval)
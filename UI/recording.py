@@ -0,0 +1,353 @@
+import os
+import re
+import sys
+import math
+import time
+import struct
+import datetime
+
+import numpy as np
+
+# Binary recording layout (little endian):
+#   header: magic, format version, record size, recording start (epoch seconds)
+#   records: epoch timestamp, kind, inside, outside, setpoint
+# Records are fixed width so a file cut short by a power failure is still
+# readable up to its last complete record.
+BINARY_MAGIC = b"PLTREC"
+BINARY_VERSION = 1
+BINARY_EXTENSION = ".pltr"
+HEADER = struct.Struct("<6sHHd")
+RECORD = struct.Struct("<dBfff")
+RECORD_DTYPE = np.dtype([("timestamp", "<f8"), ("kind", "u1"), ("inside", "<f4"), ("outside", "<f4"), ("setpoint", "<f4")])
+
+EVENT_SAMPLE = 0
+EVENT_SETPOINT_SENT = 1
+EVENT_STOP = 2
+EVENT_PROFILE_START = 3
+EVENT_PROFILE_END = 4
+EVENT_DISCONNECTED = 5
+
+EVENT_NAMES = {
+    EVENT_SAMPLE: "sample",
+    EVENT_SETPOINT_SENT: "setpoint",
+    EVENT_STOP: "stop",
+    EVENT_PROFILE_START: "profile_start",
+    EVENT_PROFILE_END: "profile_end",
+    EVENT_DISCONNECTED: "disconnected",
+}
+
+NAN = float("nan")
+
+# "[HH:MM:SS] inside, outside[, set]" - the setpoint column is optional for
+# recordings made before it existed. A two-column line must not continue
+# with another comma, matching what the old per-line parser accepted.
+TEXT_SAMPLE_PATTERN = re.compile(rb"\[(\d{2}):(\d{2}):(\d{2})\][ \t]*(-?\d+\.\d+), (-?\d+\.\d+)(?:, (-?\d+\.\d+)|(?!,))")
+TEXT_CHUNK_SIZE = 16 * 1024 * 1024
+SECONDS_PER_DAY = 86400
+
+PAYLOAD_SEPARATORS = bytes.maketrans(b",", b" ")
+
+
+def is_binary_recording(file_path):
+    return file_path.lower().endswith(BINARY_EXTENSION)
+
+
+def format_sample_line(timestamp, inside_temp, outside_temp, set_inside_temp):
+    return f"{timestamp.strftime('[%H:%M:%S] ')}{inside_temp}, {outside_temp}, {set_inside_temp}\n"
+
+
+class TextRecordWriter:
+    # The original "[HH:MM:SS] inside, outside, set" log, terminal messages included
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file = open(file_path, "w", encoding="utf-8")
+
+    def write_sample(self, timestamp, inside_temp, outside_temp, set_inside_temp):
+        self.file.write(format_sample_line(timestamp, inside_temp, outside_temp, set_inside_temp))
+        self.file.flush()
+
+    def write_message(self, message):
+        self.file.write(message)
+        self.file.flush()
+
+    def write_event(self, timestamp, kind, value=NAN):
+        # Events already reach the text log as terminal messages
+        pass
+
+    def poll(self):
+        pass
+
+    def close(self):
+        self.file.close()
+
+
+class BinaryRecordWriter:
+    # Records are packed into an in-memory buffer and written out at most every
+    # flush_interval seconds, then fsync'd at most every fsync_interval seconds.
+    # A power failure therefore loses at most fsync_interval seconds of data,
+    # as long as poll() keeps being called while the recording is idle.
+    def __init__(self, file_path, flush_interval=1.0, fsync_interval=5.0):
+        self.file_path = file_path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.buffer = bytearray()
+        self.file = open(file_path, "wb")
+        self.file.write(HEADER.pack(BINARY_MAGIC, BINARY_VERSION, RECORD.size, time.time()))
+        self.last_flush = time.monotonic()
+        self.last_fsync = self.last_flush
+        self.unsynced = True
+        self.sync(self.last_flush)
+
+    def write_sample(self, timestamp, inside_temp, outside_temp, set_inside_temp):
+        self.buffer += RECORD.pack(timestamp.timestamp(), EVENT_SAMPLE, inside_temp, outside_temp, set_inside_temp)
+        self.poll()
+
+    def write_message(self, message):
+        # Free-form text has no place in fixed-width records
+        pass
+
+    def write_event(self, timestamp, kind, value=NAN):
+        self.buffer += RECORD.pack(timestamp.timestamp(), kind, NAN, NAN, NAN if value is None else value)
+        self.poll()
+
+    def poll(self):
+        now = time.monotonic()
+        if self.buffer and now - self.last_flush >= self.flush_interval:
+            self.flush(now)
+        if self.unsynced and now - self.last_fsync >= self.fsync_interval:
+            self.sync(now)
+
+    def flush(self, now=None):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+        self.last_flush = time.monotonic() if now is None else now
+        self.unsynced = True
+
+    def sync(self, now=None):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_fsync = time.monotonic() if now is None else now
+        self.unsynced = False
+
+    def close(self):
+        try:
+            self.flush()
+            self.sync()
+        finally:
+            self.file.close()
+
+
+def open_record_writer(file_path):
+    if is_binary_recording(file_path):
+        return BinaryRecordWriter(file_path)
+    return TextRecordWriter(file_path)
+
+
+def parse_binary_header(header):
+    if len(header) < HEADER.size:
+        raise ValueError("File is too short to be a binary recording.")
+    magic, version, record_size, start_time = HEADER.unpack(header)
+    if magic != BINARY_MAGIC:
+        raise ValueError("Not a binary recording file.")
+    if version != BINARY_VERSION or record_size != RECORD.size:
+        raise ValueError(f"Unsupported binary recording version {version}.")
+    return {"version": version, "start_time": start_time}
+
+
+def read_binary_header(file_path):
+    with open(file_path, "rb") as f:
+        return parse_binary_header(f.read(HEADER.size))
+
+
+def read_binary_recording(file_path):
+    with open(file_path, "rb") as f:
+        header = parse_binary_header(f.read(HEADER.size))
+        # A trailing partial record (interrupted write) is ignored
+        count = (os.fstat(f.fileno()).st_size - HEADER.size) // RECORD.size
+        records = np.fromfile(f, dtype=RECORD_DTYPE, count=count)
+    return header, records
+
+
+def parse_text_chunk(chunk):
+    parsed = parse_text_chunk_fast(chunk)
+    if parsed is None:
+        parsed = parse_text_chunk_regex(chunk)
+    return parsed
+
+
+def parse_text_chunk_fast(chunk):
+    # Byte-level NumPy decoder for the layout the app itself writes:
+    # "[HH:MM:SS] a, b[, c]" at the start of a line. It checks every payload
+    # byte against the grammar of TEXT_SAMPLE_PATTERN (each value -?\d+\.\d+,
+    # separated by ", ") and returns None whenever the chunk contains
+    # anything it can't vouch for, so the caller falls back to the regex
+    # decoder and both decode the same lines.
+    if not chunk.endswith(b"\n"):
+        chunk += b"\n"
+    buf = np.frombuffer(chunk, dtype=np.uint8)
+    ends = np.flatnonzero(buf == ord("\n"))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    bracketed = buf[starts] == ord("[")
+    if np.count_nonzero(bracketed) != chunk.count(b"["):
+        return None
+
+    starts = starts[bracketed]
+    ends = ends[bracketed]
+    long_enough = ends - starts >= 14
+    starts = starts[long_enough]
+    ends = ends[long_enough]
+    header = buf[starts[:, None] + np.arange(12)]
+    digits = (header >= ord("0")) & (header <= ord("9"))
+    timestamped = digits[:, [1, 2, 4, 5, 7, 8]].all(axis=1) & (header[:, 3] == ord(":")) & (header[:, 6] == ord(":")) & (header[:, 9] == ord("]"))
+    value_start = digits[:, 11] | (header[:, 11] == ord("-"))
+    is_sample = timestamped & (header[:, 10] == ord(" ")) & value_start
+    # The regex allows any run of blanks after "]": other spacing before a
+    # number is left to it rather than skipped here
+    blank = (header == ord(" ")) | (header == ord("\t"))
+    if (timestamped & ~is_sample & (digits[:, 10] | (header[:, 10] == ord("-")) | (header[:, 10] == ord("\t")) | (blank[:, 10] & blank[:, 11]))).any():
+        return None
+    if not is_sample.any():
+        return None
+    starts = starts[is_sample]
+    ends = ends[is_sample]
+    header = header[is_sample].astype(np.int32) - ord("0")
+    payload_starts = starts + 11
+
+    marks = np.zeros(len(buf) + 1, dtype=np.int8)
+    marks[payload_starts] = 1
+    marks[ends] -= 1
+    in_payload = np.cumsum(marks[:-1], dtype=np.int8).view(bool)
+    if not payload_grammar_ok(buf, in_payload):
+        return None
+    # With that grammar, the ".", "," and line ends of the payloads must
+    # alternate dot, separator, dot, ... so every value has exactly one "."
+    # and each line's value count is half its share of the sequence
+    keep = in_payload.copy()
+    keep[ends] = True  # Newlines keep the lines' values apart
+    payload = buf[keep]
+    separators = np.flatnonzero((payload == ord(".")) | (payload == ord(",")) | (payload == ord("\n")))
+    if len(separators) % 2 or (payload[separators[0::2]] != ord(".")).any() or (payload[separators[1::2]] == ord(".")).any():
+        return None
+    line_ends = np.flatnonzero(payload[separators] == ord("\n"))
+    value_count = np.diff(np.concatenate(([-1], line_ends))) // 2
+    if ((value_count != 2) & (value_count != 3)).any():
+        return None
+
+    values = np.array(payload.tobytes().translate(PAYLOAD_SEPARATORS).split(), dtype=np.float64)
+    if len(values) != value_count.sum():
+        return None
+
+    first = np.cumsum(value_count) - value_count
+    seconds = (header[:, 1] * 10 + header[:, 2]) * 3600 + (header[:, 4] * 10 + header[:, 5]) * 60 + header[:, 7] * 10 + header[:, 8]
+    setpoints = np.where(value_count == 3, values[np.minimum(first + 2, len(values) - 1)], np.nan)
+    return seconds, values[first], values[first + 1], setpoints
+
+
+def payload_grammar_ok(buf, in_payload):
+    # Every payload byte against its neighbours: "-" opens a value, "."
+    # sits between digits, ", " follows a digit and precedes a value, "\r"
+    # only ends a line, and nothing else but digits may appear
+    digit = (buf >= ord("0")) & (buf <= ord("9"))
+    middle = buf[1:-1]
+    before = buf[:-2]
+    after = buf[2:]
+    ok = (digit[1:-1]
+          | (middle == ord("-")) & (before == ord(" ")) & digit[2:]
+          | (middle == ord(".")) & digit[:-2] & digit[2:]
+          | (middle == ord(",")) & digit[:-2] & (after == ord(" "))
+          | (middle == ord(" ")) & (before == ord(",")) & (digit[2:] | (after == ord("-")))
+          | (middle == ord("\r")) & digit[:-2] & (after == ord("\n")))
+    # Payloads never touch the first or last byte of the chunk
+    return bool((ok | ~in_payload[1:-1]).all())
+
+
+def parse_text_chunk_regex(chunk):
+    matches = TEXT_SAMPLE_PATTERN.findall(chunk)
+    if not matches:
+        return None
+    columns = np.array(matches, dtype=bytes)
+    seconds = columns[:, 0].astype(np.int32) * 3600 + columns[:, 1].astype(np.int32) * 60 + columns[:, 2].astype(np.int32)
+    setpoints = np.full(len(columns), np.nan)
+    has_setpoint = columns[:, 5] != b""
+    setpoints[has_setpoint] = columns[has_setpoint, 5].astype(np.float64)
+    return seconds, columns[:, 3].astype(np.float64), columns[:, 4].astype(np.float64), setpoints
+
+
+def parse_text_recording(file_path, chunk_size=TEXT_CHUNK_SIZE):
+    # Reads the file in large chunks (cut at line boundaries) and decodes
+    # every sample line of a chunk with a single regex pass. Returns
+    # (relative_times, inside, outside, setpoint) arrays; setpoint is NaN
+    # for two-column lines.
+    parts = []
+    remainder = b""
+    with open(file_path, "rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            chunk = remainder + data
+            cut = chunk.rfind(b"\n") + 1
+            remainder = chunk[cut:]
+            parsed = parse_text_chunk(chunk[:cut])
+            if parsed is not None:
+                parts.append(parsed)
+    if remainder:
+        parsed = parse_text_chunk(remainder)
+        if parsed is not None:
+            parts.append(parsed)
+    if not parts:
+        empty = np.empty(0)
+        return empty, empty, empty, empty
+    seconds, inside_temps, outside_temps, set_inside_temps = (np.concatenate(column) for column in zip(*parts))
+    return relative_seconds(seconds), inside_temps, outside_temps, set_inside_temps
+
+
+def relative_seconds(seconds_of_day):
+    # Timestamps only carry the time of day, so a big backwards jump means the
+    # recording ran past midnight
+    seconds = seconds_of_day.astype(np.float64)
+    rollovers = np.cumsum(np.diff(seconds) < -SECONDS_PER_DAY / 2)
+    seconds[1:] += rollovers * SECONDS_PER_DAY
+    return seconds - seconds[0]
+
+
+def load_binary_samples(file_path):
+    _, records = read_binary_recording(file_path)
+    samples = records[records["kind"] == EVENT_SAMPLE]
+    relative_times = samples["timestamp"] - samples["timestamp"][0] if len(samples) else np.empty(0)
+    return relative_times, samples["inside"].astype(np.float64), samples["outside"].astype(np.float64), samples["setpoint"].astype(np.float64)
+
+
+def load_recording(file_path):
+    if is_binary_recording(file_path):
+        return load_binary_samples(file_path)
+    return parse_text_recording(file_path)
+
+
+def export_text(binary_path, text_path):
+    _, records = read_binary_recording(binary_path)
+    with open(text_path, "w", encoding="utf-8") as f:
+        for timestamp, kind, inside_temp, outside_temp, setpoint in records.tolist():
+            prefix = datetime.datetime.fromtimestamp(timestamp).strftime('[%H:%M:%S] ')
+            if kind == EVENT_SAMPLE:
+                f.write(f"{prefix}{inside_temp:.1f}, {outside_temp:.1f}, {setpoint:.1f}\n")
+            elif kind == EVENT_SETPOINT_SENT and not math.isnan(setpoint):
+                f.write(f"{prefix}Sent: {setpoint:.1f}\n")
+            elif kind == EVENT_STOP:
+                f.write(f"{prefix}Received STOP command, transmission stopped.\n")
+            elif kind == EVENT_PROFILE_START:
+                f.write(f"{prefix}Starting profile transmission...\n")
+            elif kind == EVENT_PROFILE_END:
+                f.write(f"{prefix}Profile transmission completed.\n")
+            elif kind == EVENT_DISCONNECTED:
+                f.write(f"{prefix}Error: Device disconnected\n")
+    return len(records)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "export":
+        print(f"Usage: {os.path.basename(sys.argv[0])} export <recording{BINARY_EXTENSION}> <output.txt>")
+        sys.exit(2)
+    exported = export_text(sys.argv[2], sys.argv[3])
+    print(f"Exported {exported} records to {sys.argv[3]}")
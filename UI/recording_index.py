@@ -0,0 +1,243 @@
+import os
+import mmap
+
+import numpy as np
+
+from decimation import ArraySource
+from recording import (HEADER, RECORD, RECORD_DTYPE, EVENT_SAMPLE, SECONDS_PER_DAY, TEXT_CHUNK_SIZE,
+                       is_binary_recording, read_binary_header, parse_text_chunk)
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx.npz"
+TEXT_BLOCK_BYTES = 256 * 1024
+BINARY_BLOCK_RECORDS = 8192
+RAW_SAMPLE_LIMIT = 2_000_000  # Wider views are drawn from the block overview
+CHANNEL_COUNT = 3
+
+
+class RecordingIndex:
+    # Sparse time index over a recording for viewing files larger than RAM.
+    #
+    # The file is cut into blocks (~256 KB of text lines, or 8192 binary
+    # records). One streaming pass records, per block, its byte range, the
+    # relative time of its first and last sample, its sample count and the
+    # min/max of each channel. That is a few dozen bytes per block, cached in
+    # a sidecar file (<recording>.idx.npz) and reused while the recording's
+    # size and mtime are unchanged.
+    #
+    # window() answers a plot request for [t0, t1]: if the blocks covering
+    # it hold at most RAW_SAMPLE_LIMIT samples, only those bytes are read
+    # (through mmap) and parsed; wider views are drawn from the per-block
+    # min/max overview without touching the file at all. Either way memory
+    # and time depend on the view, not on the file size.
+    def __init__(self, file_path, arrays):
+        self.file_path = file_path
+        self.binary = is_binary_recording(file_path)
+        self.block_starts = arrays["block_starts"]
+        self.block_ends = arrays["block_ends"]
+        self.start_times = arrays["start_times"]
+        self.end_times = arrays["end_times"]
+        self.first_absolute = arrays["first_absolute"]
+        self.counts = arrays["counts"]
+        self.mins = arrays["mins"]
+        self.maxs = arrays["maxs"]
+        self.base_time = float(arrays["base_time"])
+        self.sample_count = int(self.counts.sum())
+
+    @classmethod
+    def open(cls, file_path, use_cache=True):
+        stat = os.stat(file_path)
+        cache_path = file_path + INDEX_SUFFIX
+        if use_cache:
+            arrays = load_cached_index(cache_path, stat)
+            if arrays is not None:
+                return cls(file_path, arrays)
+        arrays = build_binary_index(file_path) if is_binary_recording(file_path) else build_text_index(file_path)
+        if use_cache:
+            save_cached_index(cache_path, stat, arrays)
+        return cls(file_path, arrays)
+
+    def __len__(self):
+        return self.sample_count
+
+    def time_limits(self):
+        if len(self.counts) == 0:
+            return None
+        return float(self.start_times[0]), float(self.end_times[-1])
+
+    def value_limits(self):
+        if len(self.counts) == 0 or not np.isfinite(self.mins).any():
+            return None
+        return float(np.nanmin(self.mins)), float(np.nanmax(self.maxs))
+
+    def has_channel(self, channel):
+        return bool(np.isfinite(self.maxs[channel]).any())
+
+    def blocks_between(self, t0, t1):
+        first = int(np.searchsorted(self.end_times, t0, side="left"))
+        last = int(np.searchsorted(self.start_times, t1, side="right"))
+        # One block either side so lines run to the axes edges
+        return max(first - 1, 0), min(last + 1, len(self.counts))
+
+    def window(self, t0, t1, bins):
+        # (bin_times, mins, maxs) for [t0, t1], mins/maxs shaped (3, m)
+        first, last = self.blocks_between(t0, t1)
+        if first >= last:
+            empty = np.empty((CHANNEL_COUNT, 0))
+            return np.empty(0), empty, empty
+        if self.counts[first:last].sum() <= RAW_SAMPLE_LIMIT:
+            times, *channels = self.read_blocks(first, last)
+            return ArraySource(times, channels).window(t0, t1, bins)
+        middles = (self.start_times[first:last] + self.end_times[first:last]) / 2
+        bin_times, mins, _ = ArraySource(middles, self.mins[:, first:last]).window(t0, t1, bins)
+        _, _, maxs = ArraySource(middles, self.maxs[:, first:last]).window(t0, t1, bins)
+        return bin_times, mins, maxs
+
+    def read_blocks(self, first, last):
+        # Full-resolution (relative_times, inside, outside, setpoint) of
+        # blocks [first, last)
+        start = int(self.block_starts[first])
+        end = int(self.block_ends[last - 1])
+        with open(self.file_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if self.binary:
+                    records = np.frombuffer(mapped, dtype=RECORD_DTYPE, count=(end - start) // RECORD.size, offset=start)
+                    samples = records[records["kind"] == EVENT_SAMPLE]
+                    result = (samples["timestamp"] - self.base_time, samples["inside"].astype(np.float64),
+                              samples["outside"].astype(np.float64), samples["setpoint"].astype(np.float64))
+                    del records, samples
+                    return result
+                chunk = mapped[start:end]
+        parsed = parse_text_chunk(chunk)
+        if parsed is None:
+            empty = np.empty(0)
+            return empty, empty, empty, empty
+        seconds, inside_temps, outside_temps, set_inside_temps = parsed
+        day = round((self.first_absolute[first] - seconds[0]) / SECONDS_PER_DAY)
+        absolute = absolute_seconds(seconds, day)
+        return absolute - self.base_time, inside_temps, outside_temps, set_inside_temps
+
+
+def absolute_seconds(seconds_of_day, day):
+    # Same midnight rule as relative_seconds(), continuing from `day`
+    seconds = seconds_of_day.astype(np.float64)
+    days = np.full(len(seconds), float(day))
+    days[1:] += np.cumsum(np.diff(seconds) < -SECONDS_PER_DAY / 2)
+    return seconds + days * SECONDS_PER_DAY
+
+
+class IndexBuilder:
+    def __init__(self):
+        self.block_starts = []
+        self.block_ends = []
+        self.start_times = []
+        self.end_times = []
+        self.first_absolute = []
+        self.counts = []
+        self.mins = []
+        self.maxs = []
+        self.base_time = None
+
+    def add(self, start, end, absolute_times, channels):
+        if len(absolute_times) == 0:
+            return
+        if self.base_time is None:
+            self.base_time = float(absolute_times[0])
+        self.block_starts.append(start)
+        self.block_ends.append(end)
+        self.first_absolute.append(float(absolute_times[0]))
+        self.start_times.append(float(absolute_times[0]) - self.base_time)
+        self.end_times.append(float(absolute_times[-1]) - self.base_time)
+        self.counts.append(len(absolute_times))
+        with np.errstate(invalid="ignore"):
+            self.mins.append([np.fmin.reduce(channel) for channel in channels])
+            self.maxs.append([np.fmax.reduce(channel) for channel in channels])
+
+    def arrays(self):
+        return {
+            "block_starts": np.array(self.block_starts, dtype=np.int64),
+            "block_ends": np.array(self.block_ends, dtype=np.int64),
+            "start_times": np.array(self.start_times, dtype=np.float64),
+            "end_times": np.array(self.end_times, dtype=np.float64),
+            "first_absolute": np.array(self.first_absolute, dtype=np.float64),
+            "counts": np.array(self.counts, dtype=np.int64),
+            "mins": np.array(self.mins, dtype=np.float64).reshape(-1, CHANNEL_COUNT).T.copy(),
+            "maxs": np.array(self.maxs, dtype=np.float64).reshape(-1, CHANNEL_COUNT).T.copy(),
+            "base_time": np.float64(self.base_time or 0.0),
+        }
+
+
+def build_text_index(file_path, block_bytes=TEXT_BLOCK_BYTES, chunk_size=TEXT_CHUNK_SIZE):
+    # Streams the file once in large line-aligned chunks, cutting each into
+    # line-aligned blocks of about block_bytes
+    builder = IndexBuilder()
+    day = 0
+    previous_second = None
+    offset = 0
+    remainder = b""
+    with open(file_path, "rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            chunk = remainder + data
+            if data:
+                cut = chunk.rfind(b"\n") + 1
+                remainder = chunk[cut:]
+                chunk = chunk[:cut]
+            else:
+                remainder = b""
+            position = 0
+            while position < len(chunk):
+                end = chunk.find(b"\n", min(position + block_bytes, len(chunk)) - 1) + 1 or len(chunk)
+                parsed = parse_text_chunk(chunk[position:end])
+                if parsed is not None:
+                    seconds, inside_temps, outside_temps, set_inside_temps = parsed
+                    if previous_second is not None and seconds[0] - previous_second < -SECONDS_PER_DAY / 2:
+                        day += 1
+                    absolute = absolute_seconds(seconds, day)
+                    day = round((absolute[-1] - seconds[-1]) / SECONDS_PER_DAY)
+                    previous_second = seconds[-1]
+                    builder.add(offset + position, offset + end, absolute, (inside_temps, outside_temps, set_inside_temps))
+                position = end
+            offset += len(chunk)
+            if not data:
+                break
+    return builder.arrays()
+
+
+def build_binary_index(file_path, block_records=BINARY_BLOCK_RECORDS):
+    read_binary_header(file_path)
+    builder = IndexBuilder()
+    size = os.path.getsize(file_path)
+    count = (size - HEADER.size) // RECORD.size
+    if count <= 0:
+        return builder.arrays()
+    records = np.memmap(file_path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size, shape=(count,))
+    try:
+        for first in range(0, count, block_records):
+            block = records[first:first + block_records]
+            samples = block[block["kind"] == EVENT_SAMPLE]
+            builder.add(HEADER.size + first * RECORD.size, HEADER.size + (first + len(block)) * RECORD.size,
+                        samples["timestamp"], (samples["inside"], samples["outside"], samples["setpoint"]))
+    finally:
+        del records
+    return builder.arrays()
+
+
+def load_cached_index(cache_path, stat):
+    try:
+        with np.load(cache_path) as cached:
+            if (int(cached["version"]) != INDEX_VERSION or int(cached["file_size"]) != stat.st_size
+                    or int(cached["file_mtime"]) != stat.st_mtime_ns):
+                return None
+            return {name: cached[name] for name in cached.files}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def save_cached_index(cache_path, stat, arrays):
+    # Best effort: a read-only location just means rebuilding next time
+    try:
+        with open(cache_path, "wb") as f:
+            np.savez(f, version=INDEX_VERSION, file_size=stat.st_size, file_mtime=stat.st_mtime_ns, **arrays)
+    except OSError:
+        pass
@@ -0,0 +1,90 @@
+import datetime
+import threading
+import time
+from collections import deque
+
+from recording import EVENT_SETPOINT_SENT
+
+
+class SerialWriter:
+    # Owns every write to an engine's port, on a thread of its own, so
+    # callers (the Tk thread, executors, the DeviceScheduler) only append to
+    # a queue and never wait on a slow or stalled USB endpoint.
+    #
+    # A setpoint queued right behind another pending setpoint replaces it:
+    # the board only acts on the latest value, so a backlog collapses to
+    # one write instead of replaying stale temperatures. Other commands
+    # ("Profile") keep their place in the order.
+    #
+    # A setpoint is recorded (EVENT_SETPOINT_SENT) with the time it was
+    # actually transmitted. A failed write is published as
+    # ("write_error", timestamp, (command, reason)) for the owner to handle.
+    def __init__(self, engine):
+        self.engine = engine
+        self.queue = deque()  # [text, setpoint] entries; setpoint is None for other commands
+        self.condition = threading.Condition()
+        self.generation = 0  # Bumped by start()/stop(); a thread serves one generation
+        self.thread = None
+        self.last_sent = None  # (datetime, command) of the latest transmission
+        metrics = engine.metrics
+        metrics.gauge("serial_write_queue_depth", "Commands waiting for the writer", lambda: len(self.queue))
+        self.writes = metrics.counter("serial_writes_total", "Commands written to the port")
+        self.coalesced = metrics.counter("serial_setpoints_coalesced_total", "Setpoints replaced by a newer one before being sent")
+        self.errors = metrics.counter("serial_write_errors_total", "Failed writes")
+        self.latency = metrics.histogram("serial_write_seconds", "Time spent in write() and flush()")
+
+    def start(self):
+        with self.condition:
+            self.generation += 1
+            self.queue.clear()
+            generation = self.generation
+        self.thread = threading.Thread(target=self.run, args=(generation,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        # Pending commands are dropped: they were meant for this connection.
+        # The thread is not joined, since it may be stuck in a write until
+        # write_timeout; it exits on its own once that returns.
+        with self.condition:
+            self.generation += 1
+            self.queue.clear()
+            self.condition.notify_all()
+        self.thread = None
+
+    def send(self, text, setpoint=None):
+        with self.condition:
+            queue = self.queue
+            if setpoint is not None and queue and queue[-1][1] is not None:
+                queue[-1][0] = text
+                queue[-1][1] = setpoint
+                self.coalesced.inc()
+            else:
+                queue.append([text, setpoint])
+                self.condition.notify()
+
+    def run(self, generation):
+        while True:
+            with self.condition:
+                while not self.queue and self.generation == generation:
+                    self.condition.wait()
+                if self.generation != generation:
+                    return
+                text, setpoint = self.queue.popleft()
+            self.transmit(text, setpoint, generation)
+
+    def transmit(self, text, setpoint, generation):
+        start = time.perf_counter()
+        try:
+            self.engine.write(text)
+        except Exception as e:
+            if self.generation != generation:
+                return  # Disconnecting: the port was closed under us
+            self.errors.inc()
+            self.engine.publish(("write_error", datetime.datetime.now(), (text.strip(), str(e))))
+            return
+        self.latency.observe(time.perf_counter() - start)
+        self.writes.inc()
+        self.last_sent = (datetime.datetime.now(), text)
+        if setpoint is not None:
+            self.engine.record_event(EVENT_SETPOINT_SENT, setpoint)
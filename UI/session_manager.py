@@ -0,0 +1,144 @@
+from acquisition import AcquisitionEngine
+from device_scheduler import DeviceScheduler
+from profile_executor import ProfileExecutor
+from profile_schedule import build_schedule
+
+
+class DeviceSession:
+    # One controller: its own acquisition engine (telemetry, recording) and
+    # profile executor. Reading and profile timing are done by the manager's
+    # shared DeviceScheduler rather than by threads of its own.
+    def __init__(self, port, scheduler, telemetry_capacity=65536, settling=None):
+        self.port = port
+        self.scheduler = scheduler
+        self.settling = settling
+        self.engine = AcquisitionEngine(telemetry_capacity=telemetry_capacity)
+        self.events = self.engine.subscribe(maxlen=1000)
+        self.executor = None
+        self.status = "Disconnected"
+
+    @property
+    def connected(self):
+        return self.engine.connected
+
+    @property
+    def profile_running(self):
+        return self.executor is not None and self.executor.running
+
+    def connect(self):
+        self.engine.connect(self.port, start_reader=False)
+        self.scheduler.add_engine(self.engine)
+        self.status = "Connected"
+
+    def disconnect(self):
+        self.stop_profile()
+        self.scheduler.remove_engine(self.engine)
+        self.engine.stop_recording()
+        self.engine.disconnect()
+        self.status = "Disconnected"
+
+    def start_profile(self, profile, tick_interval=1.0):
+        if not self.connected:
+            raise RuntimeError(f"{self.port} is not connected.")
+        if self.profile_running:
+            raise RuntimeError(f"A profile is already running on {self.port}.")
+        schedule = build_schedule(profile, tick_interval)
+        self.executor = ProfileExecutor(self.engine, schedule, settling=self.settling)
+        self.executor.start(self.scheduler)
+
+    def stop_profile(self):
+        if self.executor is not None:
+            self.executor.stop()
+
+    def start_recording(self, file_path):
+        self.engine.start_recording(file_path)
+
+    def stop_recording(self):
+        self.engine.stop_recording()
+
+    def update_status(self):
+        # Drains the session's engine events; returns the ones a UI may want
+        # to surface (record and write errors, disconnects)
+        notices = []
+        for kind, timestamp, payload in self.events.drain():
+            if kind == "stop":
+                # Front-panel button on the board aborted the profile
+                self.stop_profile()
+                self.status = "Stopped on device"
+            elif kind == "disconnected":
+                # Closes the port and stops the writer for the dead device,
+                # the way the main window handles it
+                self.stop_profile()
+                self.scheduler.remove_engine(self.engine)
+                self.engine.disconnect()
+                self.status = "Disconnected"
+                notices.append((kind, payload))
+            elif kind == "profile_finished" and payload["executor"] is self.executor:
+                if payload["error"] is not None:
+                    self.status = "Profile error"
+                else:
+                    self.status = "Profile stopped" if payload["stopped"] else "Profile completed"
+            elif kind == "record_error":
+                notices.append((kind, payload))
+            elif kind == "write_error":
+                self.stop_profile()
+                self.status = "Write error"
+                notices.append((kind, payload))
+        return notices
+
+
+class SessionManager:
+    # N controllers in one process, keyed by port, all served by one
+    # scheduler thread
+    def __init__(self, telemetry_capacity=65536, settling=None):
+        self.telemetry_capacity = telemetry_capacity
+        self.settling = settling  # SettlingDetector shared by every session (None: defaults)
+        self.scheduler = DeviceScheduler()
+        self.sessions = {}
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        return iter(list(self.sessions.values()))
+
+    def __contains__(self, port):
+        return port in self.sessions
+
+    def get(self, port):
+        return self.sessions.get(port)
+
+    def add(self, port):
+        if port in self.sessions:
+            raise ValueError(f"{port} is already in the session.")
+        session = DeviceSession(port, self.scheduler, self.telemetry_capacity, self.settling)
+        self.scheduler.start()
+        session.connect()
+        self.sessions[port] = session
+        return session
+
+    def remove(self, port):
+        session = self.sessions.pop(port, None)
+        if session is not None:
+            session.disconnect()
+
+    def poll(self):
+        # Drains every session's events, whether or not a window shows them.
+        # Returns (port, kind, payload) for the notices a UI may surface.
+        notices = []
+        for session in self:
+            notices.extend((session.port, kind, payload) for kind, payload in session.update_status())
+        return notices
+
+    def start_profile(self, ports, profile, tick_interval=1.0):
+        for port in ports:
+            self.sessions[port].start_profile(profile, tick_interval)
+
+    def stop_profiles(self, ports=None):
+        for port in self.sessions if ports is None else ports:
+            self.sessions[port].stop_profile()
+
+    def close(self):
+        for port in list(self.sessions):
+            self.remove(port)
+        self.scheduler.close()
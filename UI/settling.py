@@ -0,0 +1,75 @@
+import time
+import numpy as np
+
+from telemetry import TIME, INSIDE
+
+DEFAULT_BAND = 0.3        # °C either side of the target
+DEFAULT_HOLD_TIME = 10.0  # s the temperature has to stay in the band
+DEFAULT_MAX_SLOPE = 0.02  # °C/s, least-squares trend over that window
+DEFAULT_MAX_AGE = 5.0     # s, older telemetry means the readings stopped
+
+
+class SettlingDetector:
+    # Decides whether the inside temperature has settled at a target: every
+    # sample of the last hold_time seconds is within ±band of it and the
+    # trend over that window (least-squares slope) is at most max_slope, so
+    # a reading that merely passes through the band on a ramp does not
+    # count. Readings are 0.1 °C steps with noise and the loop may keep a
+    # small offset, which an exact comparison would wait on forever.
+    #
+    # It reads the engine's TelemetryStore directly (a view, nothing is
+    # copied or kept here), so one detector can be shared by any number of
+    # executors and checked on every tick.
+    def __init__(self, band=DEFAULT_BAND, hold_time=DEFAULT_HOLD_TIME, max_slope=DEFAULT_MAX_SLOPE, max_age=DEFAULT_MAX_AGE):
+        if band < 0 or hold_time < 0 or max_slope < 0:
+            raise ValueError("Settling band, hold time and slope cannot be negative.")
+        self.band = band
+        self.hold_time = hold_time
+        self.max_slope = max_slope
+        self.max_age = max_age
+
+    def window(self, telemetry, now=None):
+        # Samples covering the last hold_time seconds, starting with the
+        # newest one at or before now - hold_time so the window really spans
+        # the hold time; None while there is not that much (recent) history
+        now = time.monotonic() if now is None else now
+        samples = telemetry.view()
+        times = samples[TIME]
+        if len(times) == 0 or now - times[-1] > self.max_age:
+            return None
+        first = np.searchsorted(times, now - self.hold_time, side="right") - 1
+        if first < 0:
+            return None
+        return samples[:, first:]
+
+    def settled(self, telemetry, target, now=None):
+        samples = self.window(telemetry, now)
+        if samples is None:
+            return False
+        inside = samples[INSIDE]
+        if np.abs(inside - target).max() > self.band + 1e-9:
+            return False
+        return abs(self.slope(samples)) <= self.max_slope
+
+    @staticmethod
+    def slope(samples):
+        times = samples[TIME] - samples[TIME].mean()
+        spread = np.dot(times, times)
+        if not spread > 0:
+            return 0.0
+        inside = samples[INSIDE]
+        return float(np.dot(times, inside - inside.mean()) / spread)
+
+    def describe(self):
+        return f"±{self.band:g} °C for {self.hold_time:g} s, slope ≤ {self.max_slope:g} °C/s"
+
+
+def detector_from_args(args):
+    # For the --settle-* options shared by the GUI and headless.py
+    return SettlingDetector(args.settle_band, args.settle_time, args.settle_slope)
+
+
+def add_settling_arguments(parser):
+    parser.add_argument("--settle-band", type=float, default=DEFAULT_BAND, help="°C either side of a setpoint that counts as reached (first point and \"settle\" holds)")
+    parser.add_argument("--settle-time", type=float, default=DEFAULT_HOLD_TIME, help="seconds the temperature has to stay within the band")
+    parser.add_argument("--settle-slope", type=float, default=DEFAULT_MAX_SLOPE, help="largest remaining trend in °C/s that counts as settled")
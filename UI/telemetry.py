@@ -0,0 +1,90 @@
+import time
+import numpy as np
+
+from decimation import minmax_bins
+
+TIME = 0
+INSIDE = 1
+OUTSIDE = 2
+SETPOINT = 3
+CHANNELS = ("time", "inside", "outside", "setpoint")
+
+
+class TelemetryStore:
+    # Fixed-capacity ring buffer for timestamps and the three temperature
+    # channels. Every sample is written twice, at i and i + capacity, so the
+    # latest samples are always one contiguous slice and every query can
+    # hand out NumPy views instead of copies.
+    #
+    # There is a single writer (the acquisition thread). A sample is fully
+    # written before the count moves, so the newest sample of a view is
+    # always complete. Views hold at most capacity - 1 samples: the slot the
+    # next append goes into is never part of one, so a view stays intact
+    # while the writer appends another sample. Each append after that
+    # replaces the view's oldest remaining sample; copy a view that has to
+    # outlive that.
+    #
+    # Times are time.monotonic() seconds; wall_time() converts for display.
+    def __init__(self, capacity=262144):
+        self.capacity = capacity
+        self.data = np.full((len(CHANNELS), 2 * capacity), np.nan)
+        self.count = 0
+        self.epoch_offset = time.time() - time.monotonic()
+
+    def __len__(self):
+        return min(self.count, self.capacity - 1)
+
+    def append(self, timestamp, inside_temp, outside_temp, set_inside_temp):
+        index = self.count % self.capacity
+        sample = (timestamp, inside_temp, outside_temp, set_inside_temp)
+        self.data[:, index] = sample
+        self.data[:, index + self.capacity] = sample
+        self.count += 1
+
+    def clear(self):
+        self.count = 0
+
+    def wall_time(self, timestamp):
+        return timestamp + self.epoch_offset
+
+    def span(self, n=None):
+        # Bounds (into self.data) of the latest n samples
+        count = self.count
+        available = min(count, self.capacity - 1)
+        n = available if n is None else min(n, available)
+        end = count % self.capacity + self.capacity
+        return end - n, end
+
+    def latest_sample(self):
+        if self.count == 0:
+            return None
+        _, end = self.span(1)
+        return tuple(self.data[:, end - 1])
+
+    def view(self, n=None):
+        # (4, n) view: rows are time, inside, outside, setpoint
+        start, end = self.span(n)
+        return self.data[:, start:end]
+
+    def window(self, t0, t1):
+        samples = self.view()
+        times = samples[TIME]
+        first = np.searchsorted(times, t0, side="left")
+        last = np.searchsorted(times, t1, side="right")
+        return samples[:, first:last]
+
+    def latest(self, seconds):
+        samples = self.view()
+        if samples.shape[1] == 0:
+            return samples
+        times = samples[TIME]
+        first = np.searchsorted(times, times[-1] - seconds, side="left")
+        return samples[:, first:]
+
+    def decimated(self, t0, t1, bins):
+        # Min/max per time bin over [t0, t1]. Returns (bin_times, mins, maxs)
+        # where mins/maxs are (3, k) arrays for inside, outside and setpoint;
+        # empty bins are dropped.
+        samples = self.window(t0, t1)
+        return minmax_bins(samples[TIME], samples[1:], t0, t1, bins)
+
@@ -0,0 +1,248 @@
+import os
+import json
+import stat
+import socket
+import threading
+import selectors
+
+from acquisition import Subscription
+from recording import EVENT_NAMES
+
+CLIENT_BUFFER_BYTES = 256 * 1024
+SUBSCRIPTION_EVENTS = 100000
+SEND_CHUNK_BYTES = 64 * 1024
+
+
+class NotifyingSubscription(Subscription):
+    # Wakes the server thread when events arrive. Only the first push after
+    # a drain writes to the wake socket, so a burst of samples costs the
+    # publishing thread one non-blocking send at most.
+    def __init__(self, maxlen, wake_socket):
+        super().__init__(maxlen)
+        self.wake_socket = wake_socket
+        self.pending = False
+
+    def push(self, event):
+        self.events.append(event)
+        if not self.pending:
+            self.pending = True
+            try:
+                self.wake_socket.send(b"\0")
+            except OSError:
+                pass  # Full or closed: the server is awake or gone anyway
+
+    def drain(self):
+        self.pending = False
+        return super().drain()
+
+
+def encode_event(kind, timestamp, payload):
+    # One JSON object per line. Terminal messages and profile results are
+    # for the GUI and are not streamed.
+    time = timestamp.timestamp()
+    if kind == "sample":
+        inside_temp, outside_temp, set_inside_temp = payload
+        line = {"type": "sample", "time": time, "inside": inside_temp, "outside": outside_temp, "setpoint": set_inside_temp}
+    elif kind == "event":
+        event_kind, value = payload
+        line = {"type": EVENT_NAMES.get(event_kind, str(event_kind)), "time": time}
+        if value is not None:
+            line["value"] = value
+    elif kind == "stop":
+        line = {"type": "stop", "time": time}
+    elif kind == "disconnected":
+        line = {"type": "disconnected", "time": time, "reason": payload}
+    elif kind == "record_error":
+        line = {"type": "record_error", "time": time, "reason": payload}
+    else:
+        return None
+    return json.dumps(line, separators=(",", ":"))
+
+
+class TelemetryClient:
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.buffer = bytearray()
+        self.dropped = 0
+        self.writing = False
+
+
+class TelemetryServer:
+    # Streams engine samples and events to any number of local clients as
+    # JSON lines, e.g. `nc localhost 5555`:
+    #   {"type":"sample","time":1700000000.1,"inside":25.1,"outside":22.0,"setpoint":30.0}
+    #   {"type":"setpoint","time":1700000001.0,"value":30.5}
+    #   {"type":"stop","time":...}  {"type":"disconnected","time":...,"reason":"..."}
+    #
+    # The engine only ever appends to this server's bounded subscription,
+    # so neither the reader nor recording can be held up by a client. The
+    # server thread encodes each batch once and shares the bytes with every
+    # client. Sockets are non-blocking. Each client has its own output
+    # buffer of at most client_buffer bytes: lines that don't fit are
+    # dropped for that client only, and it gets {"type":"dropped","count":n}
+    # once it has caught up.
+    def __init__(self, engine, host="127.0.0.1", port=0, unix_path=None, client_buffer=CLIENT_BUFFER_BYTES):
+        self.engine = engine
+        self.client_buffer = client_buffer
+        self.unix_path = unix_path
+        if unix_path is not None:
+            # Only a socket left by an earlier run is replaced, never a file
+            # a mistyped path happens to name
+            try:
+                mode = os.stat(unix_path).st_mode
+            except FileNotFoundError:
+                pass
+            else:
+                if not stat.S_ISSOCK(mode):
+                    raise FileExistsError(f"{unix_path} exists and is not a socket.")
+                os.unlink(unix_path)
+            self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.listener.bind(unix_path)
+        else:
+            self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.listener.bind((host, port))
+        self.listener.listen(16)
+        self.listener.setblocking(False)
+        self.address = self.listener.getsockname()
+        self.wake_receive, self.wake_send = socket.socketpair()
+        self.wake_receive.setblocking(False)
+        self.wake_send.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ, "accept")
+        self.selector.register(self.wake_receive, selectors.EVENT_READ, "wake")
+        self.subscription = None
+        self.clients = {}
+        self.lines_sent = 0
+        self.lines_dropped = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.subscription = self.engine.add_subscription(NotifyingSubscription(SUBSCRIPTION_EVENTS, self.wake_send))
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        if self.subscription is not None:
+            self.engine.unsubscribe(self.subscription)
+        self.stop_event.set()
+        try:
+            self.wake_send.send(b"\0")
+        except OSError:
+            pass
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        self.thread = None
+
+    def close(self):
+        self.stop()
+        for client in list(self.clients.values()):
+            self.drop_client(client)
+        self.selector.close()
+        self.listener.close()
+        self.wake_receive.close()
+        self.wake_send.close()
+        if self.unix_path is not None:
+            try:
+                os.unlink(self.unix_path)
+            except OSError:
+                pass
+
+    def run(self):
+        while not self.stop_event.is_set():
+            for key, mask in self.selector.select(1.0):
+                if key.data == "accept":
+                    self.accept()
+                elif key.data == "wake":
+                    try:
+                        while self.wake_receive.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                else:
+                    client = key.data
+                    if mask & selectors.EVENT_READ and not self.read_client(client):
+                        continue
+                    if mask & selectors.EVENT_WRITE:
+                        self.flush(client)
+            if self.subscription is not None:
+                self.broadcast(self.subscription.drain())
+
+    def accept(self):
+        while True:
+            try:
+                sock, address = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            client = TelemetryClient(sock, address)
+            self.clients[sock] = client
+            self.selector.register(sock, selectors.EVENT_READ, client)
+
+    def read_client(self, client):
+        # Clients only listen: input is discarded, EOF or an error ends them
+        try:
+            if client.sock.recv(4096):
+                return True
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError:
+            pass
+        self.drop_client(client)
+        return False
+
+    def drop_client(self, client):
+        self.clients.pop(client.sock, None)
+        try:
+            self.selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+
+    def broadcast(self, events):
+        if not events or not self.clients:
+            return
+        lines = [line for line in (encode_event(*event) for event in events) if line is not None]
+        if not lines:
+            return
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        for client in list(self.clients.values()):
+            if client.dropped and len(client.buffer) + 64 <= self.client_buffer:
+                client.buffer += f'{{"type":"dropped","count":{client.dropped}}}\n'.encode("utf-8")
+                client.dropped = 0
+            if len(client.buffer) + len(data) > self.client_buffer:
+                client.dropped += len(lines)
+                self.lines_dropped += len(lines)
+            else:
+                client.buffer += data
+                self.lines_sent += len(lines)
+            self.flush(client)
+
+    def flush(self, client):
+        buffer = client.buffer
+        try:
+            while buffer:
+                sent = client.sock.send(buffer[:SEND_CHUNK_BYTES])
+                del buffer[:sent]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self.drop_client(client)
+            return
+        # Only ask for writability while there is a backlog
+        writing = bool(buffer)
+        if writing != client.writing:
+            client.writing = writing
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0)
+            self.selector.modify(client.sock, events, client)
+
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "lines_sent": self.lines_sent,
+            "lines_dropped": self.lines_dropped,
+            "backlog_bytes": sum(len(client.buffer) for client in self.clients.values()),
+        }
@@ -0,0 +1,74 @@
+import tkinter as tk
+from collections import deque
+
+
+class TerminalOutput:
+    # Coalesces terminal lines and writes them to the Text widget in a single
+    # insert per frame. The widget is capped at max_lines; once it grows past
+    # the cap, the oldest lines are dropped in one bulk delete down to
+    # max_lines - trim_lines so trimming doesn't happen on every flush.
+    def __init__(self, root, text_area, max_lines=5000, flush_interval_ms=75, trim_lines=None):
+        self.root = root
+        self.text_area = text_area
+        self.max_lines = max_lines
+        self.flush_interval_ms = flush_interval_ms
+        self.trim_lines = trim_lines if trim_lines is not None else max(1, max_lines // 10)
+        self.pending = deque(maxlen=max_lines)
+        self.line_count = 1
+        self.flush_job = None
+
+    def start(self):
+        if self.flush_job is None:
+            self.flush_job = self.root.after(self.flush_interval_ms, self.flush_periodically)
+
+    def stop(self):
+        if self.flush_job is not None:
+            self.root.after_cancel(self.flush_job)
+            self.flush_job = None
+
+    def write(self, text):
+        # Safe to call from any thread; only flush() touches the widget
+        self.pending.append(text)
+
+    def clear(self):
+        self.pending.clear()
+        try:
+            self.text_area.config(state="normal")
+            self.text_area.delete("1.0", "end")
+            self.text_area.config(state="disabled")
+        except tk.TclError:
+            pass
+        self.line_count = 1
+
+    def flush_periodically(self):
+        try:
+            self.flush()
+        finally:
+            self.flush_job = self.root.after(self.flush_interval_ms, self.flush_periodically)
+
+    def flush(self):
+        if not self.pending:
+            return
+        chunks = []
+        pending = self.pending
+        while pending:
+            try:
+                chunks.append(pending.popleft())
+            except IndexError:
+                break
+        text = "".join(chunks)
+        try:
+            self.text_area.config(state="normal")
+            self.text_area.insert("end", text)
+            self.line_count += text.count("\n")
+            if self.line_count > self.max_lines:
+                # Recount from the widget only when trimming, never per line
+                self.line_count = int(self.text_area.index("end-1c").split(".")[0])
+                excess = self.line_count - (self.max_lines - self.trim_lines)
+                if excess > 0:
+                    self.text_area.delete("1.0", f"{excess + 1}.0")
+                    self.line_count -= excess
+            self.text_area.see("end")
+            self.text_area.config(state="disabled")
+        except tk.TclError:
+            pass
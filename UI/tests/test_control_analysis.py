@@ -0,0 +1,18 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from control_analysis import analyze
+
+
+def test_recording_always_in_band():
+    # No sample ever leaves the band, so every segment settles at once
+    rng = np.random.default_rng(0)
+    times = np.arange(3600.0)
+    segments, summary = analyze(times, 25 + rng.normal(0, 0.05, len(times)), np.full(len(times), 25.0))
+    assert summary["segments"] == len(segments) == 1
+    assert segments["settling_time"][0] == 0.0
+    assert summary["time_above"] == summary["time_below"] == 0.0